@@ -0,0 +1,270 @@
+import json
+import random
+import timeit
+import argparse
+import sys
+from pathlib import Path
+import numpy as np
+
+# Thư mục gốc project = 1 cấp trên (__file__/..)
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT_STR = str(PROJECT_ROOT)
+
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+RLGA_DIR = str(PROJECT_ROOT / "src" / "RLGA")   # tsp_utils import trực tiếp
+if RLGA_DIR not in sys.path:
+    sys.path.insert(0, RLGA_DIR)
+
+from utils.distance import DistanceOracle
+from utils.tsp_eval import tour_length, tour_lengths
+from utils.local_search import two_opt
+from utils.real_operators import sbx_crossover_batch, polynomial_mutation_batch
+from src.GA.TSP_GA_1 import crossover_OX, crossover_PMX
+from src.GA.TSP_GA_2 import sbx_crossover, polynomial_mutation
+from src.GA.TSP_GA_array import crossover_OX_batch, crossover_PMX_batch
+from src.GA.initPopulation import _two_opt
+from src.MFEA.mfea.tasks import decode_knapsack_batch, knapsack_ratio_order
+from tsp_utils import _two_opt_once
+
+"""
+Micro-benchmark từng toán tử / bộ đánh giá, tách khỏi engine:
+- Mỗi nhóm so sánh bản "legacy" (vòng lặp Python từng cá thể) với bản "accelerated" (theo lô NumPy,
+  neighbor list, ...) trên cùng input ngẫu nhiên, với các kích thước n (mặc định 51 .. 10000).
+- ns/op: thời gian tốt nhất (timeit, lặp tới >= 0.2s) chia cho số cá thể xử lý trong một lần gọi
+  (bản lô xử lý `batch` cá thể mỗi lần) -> legacy và accelerated so được trực tiếp.
+- Số mũ scaling: hệ số góc của log(ns/op) theo log(n) (np.polyfit) trên các n đã đo.
+- Bản legacy O(n²) quá chậm ở n lớn có max_n riêng (bỏ qua, không đo).
+Chạy: python -m benchmarks.micro_bench --sizes 51 200 1000 5000 10000 --out micro.jsonl
+"""
+
+SIZES = (51, 200, 1000, 5000, 10000)
+
+
+# ---------- Bản legacy giữ lại để so sánh (đúng như code gốc trước khi tối ưu) ----------
+def _tour_length_loop(tour, matrix):
+    """Độ dài tour bằng vòng lặp Python (fitness gốc của TSP_GA_1)."""
+    cost = 0
+    for i in range(len(tour) - 1):
+        cost += matrix[tour[i]][tour[i + 1]]
+    cost += matrix[tour[-1]][tour[0]]
+    return cost
+
+def _decode_knapsack_loop(gen, values, weights, capacity):
+    """Decode knapsack từng cá thể: lexsort (gen ↓, ratio ↓) rồi nhét tham lam (cùng thuật toán với decode_knapsack_fill)."""
+    ratio = values / np.maximum(weights, 1e-12)
+    order = np.lexsort((-ratio, -gen))
+    bits = np.zeros(len(values), dtype=int)
+    rem = float(capacity)
+    for idx in order:
+        w = weights[idx]
+        if w <= rem:
+            bits[idx] = 1
+            rem -= w
+        if rem <= 0:
+            break
+    return bits
+
+def _two_opt_full(tour, dist, max_moves=None):
+    """
+    2-opt quét toàn bộ O(n²) mỗi nước đi (tsp_utils._two_opt_once) tới cực tiểu địa phương,
+    hoặc tới khi đủ max_moves nước đi (cùng giới hạn với two_opt(max_moves=...)).
+    """
+    moves = 0
+    while (max_moves is None or moves < max_moves) and _two_opt_once(tour, dist):
+        moves += 1
+    return tour
+
+
+# ---------- Input ----------
+class Inputs:
+    """Input ngẫu nhiên (tái lập theo seed) cho một kích thước n; ma trận chỉ dựng khi cần."""
+    def __init__(self, n, batch, seed=0):
+        self.n, self.batch = n, batch
+        self.rng = np.random.default_rng(seed)
+        random.seed(seed)   # toán tử legacy dùng module random
+        self._dist = None
+
+    @property
+    def dist(self):
+        if self._dist is None:
+            self._dist = DistanceOracle(self.rng.random((self.n, 2)) * 1000.0).to_dense()
+        return self._dist
+
+    def perms(self, m):
+        return np.argsort(self.rng.random((m, self.n)), axis=1).astype(np.int32)
+
+    def reals(self, m):
+        return self.rng.random((m, self.n))
+
+    def knapsack(self):
+        values = self.rng.integers(1, 100, self.n).astype(float)
+        weights = self.rng.integers(1, 100, self.n).astype(float)
+        return values, weights, 0.5 * weights.sum()
+
+
+# ---------- Các case: make(inp) -> (hàm không đối số, số cá thể mỗi lần gọi) ----------
+def _tour_loop(inp):
+    tour, matrix = inp.perms(1)[0].tolist(), inp.dist
+    return (lambda: _tour_length_loop(tour, matrix)), 1
+
+def _tour_single(inp):
+    tour, matrix = inp.perms(1)[0], inp.dist
+    return (lambda: tour_length(tour, matrix)), 1
+
+def _tour_batch(inp):
+    pop, matrix = inp.perms(inp.batch), inp.dist
+    return (lambda: tour_lengths(pop, matrix)), inp.batch
+
+def _ox_list(inp):
+    p1, p2 = (p.tolist() for p in inp.perms(2))
+    return (lambda: crossover_OX(p1, p2)), 1
+
+def _ox_batch(inp):
+    P1, P2 = inp.perms(inp.batch), inp.perms(inp.batch)
+    return (lambda: crossover_OX_batch(P1, P2, rng=inp.rng)), inp.batch
+
+def _pmx_list(inp):
+    p1, p2 = (p.tolist() for p in inp.perms(2))
+    return (lambda: crossover_PMX(p1, p2)), 1
+
+def _pmx_batch(inp):
+    P1, P2 = inp.perms(inp.batch), inp.perms(inp.batch)
+    return (lambda: crossover_PMX_batch(P1, P2, rng=inp.rng)), inp.batch
+
+def _sbx_list(inp):
+    p1, p2 = inp.reals(2)
+    return (lambda: sbx_crossover(p1, p2)), 1
+
+def _sbx_batch(inp):
+    P1, P2 = inp.reals(inp.batch), inp.reals(inp.batch)
+    return (lambda: sbx_crossover_batch(P1, P2, rng=inp.rng)), inp.batch
+
+def _poly_list(inp):
+    x = inp.reals(1)[0]
+    return (lambda: polynomial_mutation(x.copy())), 1
+
+def _poly_batch(inp):
+    X = inp.reals(inp.batch)
+    return (lambda: polynomial_mutation_batch(X, rng=inp.rng)), inp.batch
+
+def _two_opt_legacy(inp):
+    tour, matrix = inp.perms(1)[0].tolist(), inp.dist
+    return (lambda: _two_opt_full(tour[:], matrix)), 1
+
+def _two_opt_legacy_capped(inp):
+    tour, matrix = inp.perms(1)[0].tolist(), inp.dist
+    return (lambda: _two_opt_full(tour[:], matrix, max_moves=200)), 1
+
+def _two_opt_nbr(inp):
+    tour, matrix = inp.perms(1)[0].tolist(), inp.dist
+    two_opt(tour[:], matrix)   # dựng neighbor list một lần (được cache theo ma trận)
+    return (lambda: two_opt(tour[:], matrix)), 1
+
+def _two_opt_capped(inp):
+    tour, matrix = inp.perms(1)[0].tolist(), inp.dist
+    _two_opt(matrix, tour[:])
+    return (lambda: _two_opt(matrix, tour[:], max_swaps=200)), 1
+
+def _knap_loop(inp):
+    gen, (values, weights, cap) = inp.reals(1)[0], inp.knapsack()
+    return (lambda: _decode_knapsack_loop(gen, values, weights, cap)), 1
+
+def _knap_batch(inp):
+    G, (values, weights, cap) = inp.reals(inp.batch), inp.knapsack()
+    order = knapsack_ratio_order(values, weights)
+    return (lambda: decode_knapsack_batch(G, values, weights, cap, ratio_order=order)), inp.batch
+
+# (nhóm, tên, loại, max_n, make)
+CASES = [
+    ("tour_length", "python loop", "legacy", None, _tour_loop),
+    ("tour_length", "tour_length", "accelerated", None, _tour_single),
+    ("tour_length", "tour_lengths (batch)", "accelerated", None, _tour_batch),
+    ("crossover_ox", "crossover_OX", "legacy", None, _ox_list),
+    ("crossover_ox", "crossover_OX_batch", "accelerated", None, _ox_batch),
+    ("crossover_pmx", "crossover_PMX", "legacy", None, _pmx_list),
+    ("crossover_pmx", "crossover_PMX_batch", "accelerated", None, _pmx_batch),
+    ("sbx", "sbx_crossover", "legacy", None, _sbx_list),
+    ("sbx", "sbx_crossover_batch", "accelerated", None, _sbx_batch),
+    ("polynomial_mutation", "polynomial_mutation", "legacy", None, _poly_list),
+    ("polynomial_mutation", "polynomial_mutation_batch", "accelerated", None, _poly_batch),
+    ("two_opt", "full-scan 2-opt", "legacy", 200, _two_opt_legacy),
+    ("two_opt", "two_opt (neighbor list)", "accelerated", None, _two_opt_nbr),
+    ("two_opt_capped", "full-scan 2-opt (200 moves)", "legacy", 200, _two_opt_legacy_capped),
+    ("two_opt_capped", "_two_opt (max_swaps=200)", "accelerated", None, _two_opt_capped),
+    ("knapsack_decode", "greedy loop", "legacy", None, _knap_loop),
+    ("knapsack_decode", "decode_knapsack_batch", "accelerated", None, _knap_batch),
+]
+
+
+# ---------- Đo ----------
+def time_per_op(fn, ops, repeat=3):
+    """ns/op tốt nhất: autorange (>= 0.2s mỗi lượt), lấy min của `repeat` lượt."""
+    timer = timeit.Timer(fn)
+    loops, best = timer.autorange()
+    if repeat > 1:
+        best = min([best] + timer.repeat(repeat - 1, loops))
+    return best / loops / ops * 1e9
+
+def scaling_exponent(ns, ts):
+    """Hệ số góc log(t) ~ log(n) (None nếu < 2 điểm)."""
+    if len(ns) < 2:
+        return None
+    return float(np.polyfit(np.log(ns), np.log(ts), 1)[0])
+
+def run(sizes=SIZES, groups=None, batch=64, repeat=3, seed=0):
+    """
+    Đo mọi case thuộc `groups` (None = tất cả) ở mỗi kích thước.
+    Trả về (records, summary): records = mỗi (case, n) một dict; summary = mỗi case một dict
+    với số mũ scaling và speedup so với bản legacy cùng nhóm.
+    """
+    cases = [c for c in CASES if groups is None or c[0] in groups]
+    records = []
+    for n in sizes:
+        inp = Inputs(n, batch, seed)
+        for group, name, kind, max_n, make in cases:
+            if max_n is not None and n > max_n:
+                continue
+            fn, ops = make(inp)
+            ns = time_per_op(fn, ops, repeat)
+            records.append(dict(group=group, impl=name, kind=kind, n=n, ops_per_call=ops, ns_per_op=ns))
+            print(f"{group:>20} {name:<28} n={n:<6} {ns:>14.1f} ns/op")
+        del inp
+
+    summary = []
+    for group, name, kind, _, _ in cases:
+        rows = [r for r in records if r["group"] == group and r["impl"] == name]
+        legacy = {r["n"]: r["ns_per_op"] for r in records if r["group"] == group and r["kind"] == "legacy"}
+        summary.append(dict(
+            group=group, impl=name, kind=kind,
+            exponent=scaling_exponent([r["n"] for r in rows], [r["ns_per_op"] for r in rows]),
+            speedup={r["n"]: legacy[r["n"]] / r["ns_per_op"] for r in rows if r["n"] in legacy},
+        ))
+    return records, summary
+
+def print_summary(summary):
+    print(f"\n{'group':>20} {'impl':<28} {'exp':>6}  speedup vs legacy")
+    for s in summary:
+        exp = "-" if s["exponent"] is None else f"{s['exponent']:.2f}"
+        speed = " ".join(f"n={n}:{x:.1f}x" for n, x in s["speedup"].items()) if s["kind"] != "legacy" else ""
+        print(f"{s['group']:>20} {s['impl']:<28} {exp:>6}  {speed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for GA operators and evaluators")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--groups", nargs="+", default=None,
+                        help="tour_length crossover_ox crossover_pmx sbx polynomial_mutation two_opt two_opt_capped knapsack_decode")
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default=None, help="ghi records + summary ra file JSONL")
+    args = parser.parse_args()
+
+    records, summary = run(args.sizes, args.groups, batch=args.batch, repeat=args.repeat)
+    print_summary(summary)
+    if args.out:
+        with open(args.out, "w") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+            for s in summary:
+                f.write(json.dumps(dict(s, speedup={str(k): v for k, v in s["speedup"].items()})) + "\n")
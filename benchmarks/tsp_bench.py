@@ -0,0 +1,233 @@
+import io
+import csv
+import json
+import time
+import argparse
+import itertools
+import subprocess
+import tracemalloc
+import contextlib
+import sys
+from pathlib import Path
+
+# Thư mục gốc project = 1 cấp trên (__file__/..)
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT_STR = str(PROJECT_ROOT)
+
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+RLGA_DIR = str(PROJECT_ROOT / "src" / "RLGA")   # ga_tsp / rl_edge_dql import tsp_utils trực tiếp
+if RLGA_DIR not in sys.path:
+    sys.path.insert(0, RLGA_DIR)
+
+from utils.tsplib_io import load_tsp, read_tour
+from utils.tsp_eval import tour_length, tour_lengths
+from utils.observer import SummaryObserver, Tracker
+from utils.rng import as_generator
+from src.GA.TSP_GA_1 import GA
+from src.GA import TSP_GA_2
+from src.GA.initPopulation import init_population_greedy
+from ga_tsp import GA_tsp
+from rl_edge_dql import EdgeDoubleQL
+
+"""
+Benchmark các engine TSP trên nhiều instance TSPLIB x nhiều seed:
+- Engine: "ga" (TSP_GA_1.GA, mọi tổ hợp selection/crossover/mutation), "ga2" (TSP_GA_2.GA,
+  polynomial/gaussian), "rlga" (EdgeDoubleQL -> make_seeds -> GA_tsp), "greedy" (NN từ mọi đỉnh)
+- Mỗi lần chạy ghi một bản ghi: wall time, setup_s (phần chuẩn bị trước engine được quan sát,
+  vd. huấn luyện RL của rlga), số lần đánh giá tour + evals/s (chia cho wall - setup_s), chi phí cuối,
+  gap so với tối ưu (<instance>.opt.tour nếu có), thời gian đạt gap X%, thời gian từng pha
+  và (--memory) peak memory — đo bằng tracemalloc trong một lần chạy lại riêng cùng seed,
+  để tracemalloc không làm chậm lần chạy được tính giờ.
+- Số đánh giá, thời điểm mỗi thế hệ và thời gian pha lấy từ utils.observer.SummaryObserver
+  gắn vào engine (thời điểm thật, không nội suy).
+- Kết quả nối thêm vào file JSONL (mỗi dòng một lần chạy, có git commit) -> so sánh giữa các phiên bản;
+  --csv ghi thêm bảng phẳng.
+
+Chạy: python -m benchmarks.tsp_bench data/TSP/eil51.tsp --engines ga rlga --seeds 0 1 2
+"""
+
+RESULTS = PROJECT_ROOT / "benchmarks" / "results.jsonl"
+
+SELECTIONS = ("tournament", "roulette")
+CROSSOVERS = ("ox", "pmx", "erx")
+MUTATIONS = ("swap", "inversion")
+REAL_MUTATIONS = ("polynomial", "gaussian")
+
+
+# ---------- Các lần chạy: trả về (best_cost, giây trước khi engine được quan sát bắt đầu) ----------
+def _run_ga(dist, seed, cfg, observer, selection, crossover, mutation):
+    _, best_cost, _ = GA(dist, selection, crossover, mutation, pop_size=cfg["pop_size"],
+                         patience=cfg["patience"], engine=cfg["ga_engine"], seed=seed, observer=observer)
+    return best_cost, 0.0
+
+def _run_ga2(dist, seed, cfg, observer, mutation):
+    _, best_cost, _ = TSP_GA_2.GA(dist, mutation, pop_size=cfg["pop_size"], generations=cfg["generations"],
+                                  patience=cfg["patience"], seed=seed, observer=observer)
+    return best_cost, 0.0
+
+def _run_rlga(dist, seed, cfg, observer):
+    t0 = time.perf_counter()
+    rng = as_generator(seed)
+    rl = EdgeDoubleQL(len(dist), seed=rng)
+    rl.train(dist, episodes=cfg["episodes"], reward="inv", start_mode="all")
+    init_pop = rl.make_seeds(dist, k=40, diversify=True, do_2opt=True)
+    offset = time.perf_counter() - t0   # huấn luyện RL + seed, trước khi GA_tsp bắt đầu
+    _, best_cost, _ = GA_tsp(dist, init_pop, pop_size=cfg["pop_size"], gens=cfg["generations"],
+                             use_2opt_every=40, seed=rng, observer=observer)
+    return best_cost, offset
+
+def _run_greedy(dist, seed, cfg, observer):
+    n = len(dist)
+    tracker = Tracker(observer, "greedy", n=n)
+    tours = init_population_greedy(n, n, distance_matrix=dist, alpha=0.0, rng=seed)
+    costs = tour_lengths(tours, dist)
+    tracker.generation(0, costs, len(tours))
+    tracker.end(best_cost=float(costs.min()))
+    return float(costs.min()), 0.0
+
+def cases(engines):
+    """(engine, tên cấu hình, hàm chạy(dist, seed, cfg, observer)) cho các engine được chọn."""
+    out = []
+    if "ga" in engines:
+        for sel, cx, mut in itertools.product(SELECTIONS, CROSSOVERS, MUTATIONS):
+            out.append(("ga", f"{sel}/{cx}/{mut}",
+                        lambda d, s, c, o, a=(sel, cx, mut): _run_ga(d, s, c, o, *a)))
+    if "ga2" in engines:
+        for mut in REAL_MUTATIONS:
+            out.append(("ga2", mut, lambda d, s, c, o, m=mut: _run_ga2(d, s, c, o, m)))
+    if "rlga" in engines:
+        out.append(("rlga", "edgeql+ga_tsp", _run_rlga))
+    if "greedy" in engines:
+        out.append(("greedy", "nn-all-starts", _run_greedy))
+    return out
+
+
+# ---------- Đo ----------
+def optimum_of(instance, dist):
+    """Chi phí tối ưu từ <instance>.opt.tour cùng thư mục (None nếu không có)."""
+    path = Path(instance).with_suffix(".opt.tour")
+    return tour_length(read_tour(path), dist) if path.exists() else None
+
+def time_to_gaps(events, optimum, offset, gaps):
+    """{gap%: giây tới khi best <= optimum*(1+gap/100)} theo thời điểm thật của từng thế hệ."""
+    out = {}
+    for gap in gaps:
+        target = optimum * (1 + gap / 100.0) + 1e-9
+        ev = next((e for e in events if e["best"] <= target), None)
+        out[str(gap)] = None if ev is None else round(offset + ev["elapsed"], 6)
+    return out
+
+def peak_memory(run, dist, seed, cfg):
+    """Peak bộ nhớ Python (byte) của một lần chạy dưới tracemalloc — không dùng để tính giờ."""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(dist, seed, cfg, None)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_case(run, dist, seed, cfg, optimum, gaps, memory=False):
+    """
+    Một lần chạy được tính giờ, stdout của engine bị nuốt. Trả về dict chỉ số.
+    memory=True: chạy lại cùng seed dưới tracemalloc để lấy peak_mb (lần tính giờ không bị ảnh hưởng).
+    """
+    obs = SummaryObserver()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        best_cost, offset = run(dist, seed, cfg, obs)
+    wall = time.perf_counter() - t0
+    peak = peak_memory(run, dist, seed, cfg) if memory else None
+    search = wall - offset   # phần engine được quan sát (rlga: trừ huấn luyện RL + make_seeds)
+    rec = dict(
+        wall_s=round(wall, 6), setup_s=round(offset, 6), evals=obs.evals,
+        evals_per_s=round(obs.evals / search, 1) if search > 0 else None,
+        best_cost=float(best_cost), generations=obs.generations,
+        peak_mb=None if peak is None else round(peak / 2 ** 20, 3),
+        phases_s={k: round(v, 6) for k, v in obs.phases.items()},
+    )
+    if optimum:
+        rec["gap_pct"] = round(100.0 * (best_cost - optimum) / optimum, 4)
+        rec["time_to_gap_s"] = time_to_gaps(obs.events, optimum, offset, gaps)
+    return rec
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark(instances, engines=("ga", "ga2", "rlga", "greedy"), seeds=(0,), gaps=(10, 5, 2, 1),
+              out=RESULTS, csv_path=None, memory=False, **cfg):
+    """
+    Chạy mọi (instance, engine/cấu hình, seed), nối kết quả vào `out` (JSONL) và trả về list bản ghi.
+    cfg: pop_size, patience, generations, episodes, ga_engine ("list" / "array").
+    """
+    cfg = dict(dict(pop_size=50, patience=50, generations=200, episodes=1000, ga_engine="list"), **cfg)
+    commit, stamp = git_commit(), time.strftime("%Y-%m-%dT%H:%M:%S")
+    records = []
+    for instance in instances:
+        dist, _ = load_tsp(instance)
+        optimum = optimum_of(instance, dist)
+        for engine, config, run in cases(engines):
+            for seed in seeds:
+                rec = dict(timestamp=stamp, commit=commit, instance=Path(instance).stem, n=len(dist),
+                           optimum=optimum, engine=engine, config=config, seed=seed)
+                try:
+                    rec.update(run_case(run, dist, seed, cfg, optimum, gaps, memory=memory))
+                except ValueError as e:   # cấu hình engine không hỗ trợ (vd. ga_engine="array" + erx)
+                    print(f"{rec['instance']:>10} {engine:>6} {config:<24} skipped: {e}")
+                    break
+                records.append(rec)
+                print(f"{rec['instance']:>10} {engine:>6} {config:<24} seed={seed} "
+                      f"cost={rec['best_cost']:.1f} gap={rec.get('gap_pct')}% "
+                      f"{rec['wall_s']:.2f}s {rec['evals_per_s']} ev/s")
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "a") as f:
+        for rec in records:
+            f.write(json.dumps(rec) + "\n")
+    if csv_path:
+        write_csv(records, csv_path)
+    return records
+
+def write_csv(records, path):
+    """Bảng phẳng: time_to_gap_s -> các cột ttg_<gap>, phases_s -> các cột phase_<tên>."""
+    rows = []
+    for rec in records:
+        row = {k: v for k, v in rec.items() if k not in ("time_to_gap_s", "phases_s")}
+        for gap, t in (rec.get("time_to_gap_s") or {}).items():
+            row[f"ttg_{gap}"] = t
+        for name, t in rec["phases_s"].items():
+            row[f"phase_{name}"] = t
+        rows.append(row)
+    fields = list(dict.fromkeys(k for row in rows for k in row))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark TSP engines on TSPLIB instances")
+    parser.add_argument("instances", nargs="*", default=["data/TSP/eil51.tsp"])
+    parser.add_argument("--engines", nargs="+", default=["ga", "ga2", "rlga", "greedy"])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0, 1, 2])
+    parser.add_argument("--gaps", nargs="+", type=float, default=[10, 5, 2, 1])
+    parser.add_argument("--pop-size", type=int, default=50)
+    parser.add_argument("--patience", type=int, default=50)
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--ga-engine", choices=["list", "array"], default="list")
+    parser.add_argument("--out", default=str(RESULTS))
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--memory", action="store_true", help="đo thêm peak memory (chạy lại mỗi case dưới tracemalloc)")
+    args = parser.parse_args()
+
+    benchmark(args.instances, engines=args.engines, seeds=args.seeds, gaps=args.gaps,
+              out=args.out, csv_path=args.csv, memory=args.memory,
+              pop_size=args.pop_size, patience=args.patience, generations=args.generations,
+              episodes=args.episodes, ga_engine=args.ga_engine)
@@ -1,7 +1,7 @@
 import random
 import numpy as np
-import tsplib95
 import sys, os
+from collections import OrderedDict
 from pathlib import Path
 
 # Thư mục gốc project = 2 cấp trên (__file__/../..)
@@ -12,36 +12,51 @@ if PROJECT_ROOT_STR not in sys.path:
     sys.path.insert(0, PROJECT_ROOT_STR)
     
 from utils.plot import plot_scores, plot_tour
+from utils.tsplib_io import load_tsp
+from utils.tsp_eval import tour_length, tour_lengths, swap_delta, reversal_delta
+from utils.evaluator import open_evaluator
+from utils.rng import as_generator, py_random
+from utils.observer import Tracker, NULL_CLOCK, edge_diversity
+from utils.perm_operators import crossover_ERX
 from src.GA.initPopulation import init_population_greedy
+from src.GA.TSP_GA_array import GA_array
 
 # ---------- B1: Khởi tạo quần thể (mỗi cá thể là một hoán vị) ----------
-def init_population(pop_size, num_genes):
+def init_population(pop_size, num_genes, rng=random):
     """Khởi tạo quần thể (mỗi cá thể là một hoán vị)"""
     population = []
     for _ in range(pop_size):
         individual = list(range(num_genes))
-        random.shuffle(individual)
+        rng.shuffle(individual)
         population.append(individual)
     return population
 
 
 # ---------- B2: Chọn cha mẹ ----------
-def selection_parent_Tournament(population, matrix, k=5):
-    """Tournament: chọn random k cá thể -> lấy cá thể tốt nhất"""
-    selected = random.sample(population, k)
-    selected.sort(key=lambda ind: fitness(ind, matrix), reverse=True)
-    return selected[0]
-
-def selection_parent_Roulette(population, matrix):
+def selection_parent_Tournament(population, matrix, k=5, fitnesses=None, rng=random):
+    """
+    Tournament: chọn random k cá thể -> lấy cá thể tốt nhất
+    - fitnesses: mảng fitness song song với population (nếu có thì không tính lại)
+    - rng: nguồn ngẫu nhiên (module random hoặc random.Random)
+    """
+    if fitnesses is None:
+        selected = rng.sample(population, k)
+        selected.sort(key=lambda ind: fitness(ind, matrix), reverse=True)
+        return selected[0]
+    idx = rng.sample(range(len(population)), k)
+    return population[max(idx, key=lambda i: fitnesses[i])]
+
+def selection_parent_Roulette(population, matrix, fitnesses=None, rng=random):
     """
     Roulette Wheel Selection
-    - Tính fitness cho tất cả cá thể.
+    - Tính fitness cho tất cả cá thể (hoặc dùng mảng fitnesses có sẵn).
     - Tính tổng F = ∑ fi và xác suất tích lũy.
     - Rút số ngẫu nhiên r ∈ [0, F), chọn cá thể có tích lũy ≥ r.
     """
-    fitnesses = [fitness(ind, matrix) for ind in population]
+    if fitnesses is None:
+        fitnesses = [fitness(ind, matrix) for ind in population]
     total_fit = sum(fitnesses)
-    pick = random.uniform(0, total_fit)
+    pick = rng.uniform(0, total_fit)
     current = 0
     for ind, fit in zip(population, fitnesses):
         current += fit
@@ -51,7 +66,7 @@ def selection_parent_Roulette(population, matrix):
 
 
 # ---------- B3: Lai ghép ----------
-def crossover_OX(parent1, parent2):
+def crossover_OX(parent1, parent2, rng=random):
     """
     Order Crossover (OX) — trả về 1 con:
     B1: Chọn hai điểm cắt a < b
@@ -59,7 +74,7 @@ def crossover_OX(parent1, parent2):
     B3: Duyệt parent2 theo thứ tự; nếu gene chưa có trong child thì chèn vào vị trí trống (theo vòng)
     """
     size = len(parent1)
-    a, b = sorted(random.sample(range(size), 2))
+    a, b = sorted(rng.sample(range(size), 2))
     child = [None] * size
     child[a:b] = parent1[a:b]
     pos = b
@@ -71,7 +86,7 @@ def crossover_OX(parent1, parent2):
             pos += 1
     return child
 
-def crossover_PMX(parent1, parent2):
+def crossover_PMX(parent1, parent2, rng=random):
     """
     Partially Mapped Crossover (PMX) — trả về 1 con:
     B1: Chọn hai điểm cắt a < b
@@ -80,7 +95,7 @@ def crossover_PMX(parent1, parent2):
     B4: Với vị trí ngoài đoạn [a:b], fill bằng parent2[i], nhưng nếu trùng với vùng copy thì dịch theo mapping cho tới khi hợp lệ
     """
     size = len(parent1)
-    a, b = sorted(random.sample(range(size), 2))
+    a, b = sorted(rng.sample(range(size), 2))
 
     child = [None] * size
     child[a:b] = parent1[a:b]
@@ -99,28 +114,155 @@ def crossover_PMX(parent1, parent2):
 
 
 # ---------- B4: Đột biến ----------
-def mutation_Inversion(individual):
-    """Đột biến Inversion: đảo ngược một đoạn gen"""
-    a, b = sorted(random.sample(range(len(individual)), 2))
+def mutation_Inversion(individual, matrix=None, rng=random):
+    """
+    Đột biến Inversion: đảo ngược một đoạn gen
+    - matrix: nếu có thì trả về (individual, delta) — delta = thay đổi độ dài tour (2 cạnh)
+    """
+    a, b = sorted(rng.sample(range(len(individual)), 2))
+    delta = reversal_delta(individual, matrix, a, b) if matrix is not None else None
     individual[a:b] = reversed(individual[a:b])
-    return individual
+    return individual if matrix is None else (individual, delta)
 
-def mutation_Swap(individual):
-    """Đột biến Swap: hoán đổi 2 gene"""
-    a, b = random.sample(range(len(individual)), 2)
+def mutation_Swap(individual, matrix=None, rng=random):
+    """
+    Đột biến Swap: hoán đổi 2 gene
+    - matrix: nếu có thì trả về (individual, delta) — delta = thay đổi độ dài tour (tối đa 4 cạnh)
+    """
+    a, b = rng.sample(range(len(individual)), 2)
+    delta = swap_delta(individual, matrix, a, b) if matrix is not None else None
     individual[a], individual[b] = individual[b], individual[a]
-    return individual
+    return individual if matrix is None else (individual, delta)
 
 
 # ---------- Fitness ----------
 def fitness(individual, matrix):
-    cost = 0
-    for i in range(len(individual) - 1):
-        cost += matrix[individual[i]][individual[i+1]]
-    cost += matrix[individual[-1]][individual[0]]
+    cost = tour_length(individual, matrix)
     return 1 / (cost + 1e-9)
 
 
+class FitnessCache:
+    """
+    Bộ nhớ đệm fitness (LRU, giới hạn kích thước):
+    - Khóa = tuple(tour) -> mỗi tour chỉ bị tính fitness một lần.
+    - maxsize: số tour tối đa được giữ, vượt quá thì bỏ tour ít dùng nhất.
+    - evaluator: backend utils.evaluator dùng cho batch() (None = tour_lengths tuần tự).
+    """
+    def __init__(self, matrix, maxsize=10000, evaluator=None):
+        self.matrix = matrix
+        self.evaluator = evaluator
+        self.maxsize = maxsize
+        self._store = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, individual):
+        key = tuple(individual)
+        value = self._store.get(key)
+        if value is not None:
+            self._store.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = fitness(individual, self.matrix)
+        self._put(key, value)
+        return value
+
+    def batch(self, population):
+        """Fitness cho cả danh sách tour: các tour chưa có trong cache được tính 1 lần bằng tour_lengths."""
+        keys = [tuple(ind) for ind in population]
+        values = [self._store.get(key) for key in keys]
+        missing = [i for i, v in enumerate(values) if v is None]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            batch = [population[i] for i in missing]
+            if self.evaluator is not None:
+                costs = self.evaluator.tour_lengths(batch)
+            else:
+                costs = tour_lengths(batch, self.matrix)
+            for i, cost in zip(missing, costs):
+                values[i] = 1 / (float(cost) + 1e-9)
+                self._put(keys[i], values[i])
+        for key, v in zip(keys, values):
+            if key in self._store:
+                self._store.move_to_end(key)
+        return values
+
+    def _put(self, key, value):
+        self._store[key] = value
+        if len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+
+# ---------- Một thế hệ ----------
+def next_generation(population, fits, matrix, cache, selection_parent, crossover, mutation,
+                    pop_size, crossover_rate=0.9, mutation_rate=0.1, rng=random, clock=NULL_CLOCK):
+    """
+    Sinh một thế hệ mới (B2 -> B4), dùng chung cho GA và island model:
+    - Chọn cha mẹ từ mảng fits, lai ghép + đột biến -> pop_size con
+    - Con copy từ p1 (không lai ghép) mang theo chi phí của cha + delta đột biến,
+      chỉ con sinh từ lai ghép mới phải đánh giá (qua cache)
+    - Elitism: gộp cha+con, giữ top pop_size theo fitness
+    - rng: random.Random của engine (mặc định module random)
+    - clock: utils.observer.PhaseClock để đo thời gian từng pha (mặc định không đo)
+    Trả về: (population, fits) đã sắp fitness giảm dần.
+    """
+    fit_of = {id(ind): f for ind, f in zip(population, fits)}
+    new_pop, new_fits = [], []
+
+    for _ in range(pop_size):
+        # chọn cha mẹ
+        if selection_parent == "tournament":
+            p1 = selection_parent_Tournament(population, matrix, fitnesses=fits, rng=rng)
+            p2 = selection_parent_Tournament(population, matrix, fitnesses=fits, rng=rng)
+        elif selection_parent == "roulette":
+            p1 = selection_parent_Roulette(population, matrix, fitnesses=fits, rng=rng)
+            p2 = selection_parent_Roulette(population, matrix, fitnesses=fits, rng=rng)
+        clock.lap("selection")
+
+        # lai ghép
+        child_fit = None
+        if rng.random() < crossover_rate:
+            if crossover == "ox":
+                child = crossover_OX(p1, p2, rng)
+            elif crossover == "pmx":
+                child = crossover_PMX(p1, p2, rng)
+            elif crossover == "erx":
+                child = crossover_ERX(p1, p2, rng)
+        else:
+            child = p1[:]
+            child_fit = fit_of[id(p1)]
+        clock.lap("crossover")
+
+        # đột biến (biết chi phí cha -> cập nhật bằng delta, không tính lại cả tour)
+        if rng.random() < mutation_rate and mutation in ("swap", "inversion"):
+            operator = mutation_Swap if mutation == "swap" else mutation_Inversion
+            if child_fit is None:
+                child = operator(child, rng=rng)
+            else:
+                child, delta = operator(child, matrix, rng=rng)
+                child_fit = 1 / (1 / child_fit + delta)
+        clock.lap("mutation")
+
+        new_pop.append(child)
+        new_fits.append(child_fit)
+
+    # chỉ đánh giá các con chưa biết chi phí
+    missing = [i for i, f in enumerate(new_fits) if f is None]
+    for i, f in zip(missing, cache.batch([new_pop[i] for i in missing])):
+        new_fits[i] = f
+    clock.lap("evaluation")
+
+    # elitism (chỉ đọc mảng fitness, không tính lại)
+    population = population + new_pop
+    fits = fits + new_fits
+    order = sorted(range(len(population)), key=lambda i: fits[i], reverse=True)[:pop_size]
+    population, fits = [population[i] for i in order], [fits[i] for i in order]
+    clock.lap("elitism")
+    return population, fits
+
+
 # ---------- GA chính ----------
 def GA(
     matrix,
@@ -130,92 +272,92 @@ def GA(
     pop_size=50,
     crossover_rate=0.9,
     mutation_rate=0.1,
-    patience=100
+    patience=100,
+    cache_size=10000,
+    engine="list",
+    evaluator="serial",
+    workers=None,
+    seed=None,
+    observer=None
 ):
     """6
     - B1: Khởi tạo quần thể
     - B2: Chọn cha mẹ (Tournament / Roulette)
-    - B3: Lai ghép (OX / PMX) + Đột biến (Swap / Inversion)
+    - B3: Lai ghép (OX / PMX / ERX) + Đột biến (Swap / Inversion)
     - B4: Elitism: gộp cha+con, giữ top pop_size
     - B5: Dừng khi không cải thiện sau `patience` thế hệ
+    Fitness của quần thể được giữ trong mảng `fits` song song với population
+    (tính qua FitnessCache giới hạn `cache_size`), selection/elitism chỉ đọc mảng này.
+    engine="array": chạy GA_array (quần thể là ma trận NumPy, toán tử theo lô).
+    evaluator: "serial" / "thread" / "process" (hoặc một evaluator có sẵn), workers: số worker.
+    seed: None / int / numpy.random.Generator — cùng seed cho cùng kết quả (utils.rng).
+    observer: utils.observer.Observer nhận event mỗi thế hệ (thời gian từng pha, số đánh giá, ...).
     """
+    if isinstance(matrix, (list, tuple)):   # swap_delta / reversal_delta đánh chỉ số kiểu dist[i, j]
+        matrix = np.asarray(matrix, dtype=float)
+    if engine == "array":
+        return GA_array(matrix, selection_parent, crossover, mutation, pop_size=pop_size,
+                        crossover_rate=crossover_rate, mutation_rate=mutation_rate, patience=patience,
+                        evaluator=evaluator, workers=workers, seed=seed, observer=observer)
+    tracker = Tracker(observer, "GA", pop_size=pop_size, n=len(matrix), selection=selection_parent,
+                      crossover=crossover, mutation=mutation)
+    gen = as_generator(seed)
     n = len(matrix)
     population = init_population_greedy(
         pop_size,
         num_genes=len(matrix),
         distance_matrix=matrix,
         alpha=0.5,       
-        use_2opt=True      
+        use_2opt=True,
+        rng=gen
     )
-    best = max(population, key=lambda ind: fitness(ind, matrix))
-    best_cost = 1 / fitness(best, matrix)
-
-    history = [best_cost]
-    no_improve = 0
-    g = 0
-
-    while no_improve < patience:
-        g += 1
-        new_pop = []
-
-        for _ in range(pop_size):
-            # chọn cha mẹ
-            if selection_parent == "tournament":
-                p1 = selection_parent_Tournament(population, matrix)
-                p2 = selection_parent_Tournament(population, matrix)
-            elif selection_parent == "roulette":
-                p1 = selection_parent_Roulette(population, matrix)
-                p2 = selection_parent_Roulette(population, matrix)
-
-            # lai ghép
-            if random.random() < crossover_rate:
-                if crossover == "ox":
-                    child = crossover_OX(p1, p2)
-                elif crossover == "pmx":
-                    child = crossover_PMX(p1, p2)
+    rng = py_random(gen)
+    with open_evaluator(matrix, evaluator, workers) as ev:
+        cache = FitnessCache(matrix, maxsize=cache_size, evaluator=ev)
+        fits = cache.batch(population)
+        best_idx = max(range(len(population)), key=lambda i: fits[i])
+        best = population[best_idx]
+        best_cost = 1 / fits[best_idx]
+        tracker.generation(0, lambda: 1 / np.asarray(fits), cache.misses,
+                           lambda: edge_diversity(population, population[best_idx]))
+
+        history = [best_cost]
+        no_improve = 0
+        g = 0
+
+        while no_improve < patience:
+            g += 1
+            misses = cache.misses
+            population, fits = next_generation(
+                population, fits, matrix, cache, selection_parent, crossover, mutation,
+                pop_size, crossover_rate, mutation_rate, rng, tracker.clock
+            )
+            tracker.generation(g, lambda: 1 / np.asarray(fits), cache.misses - misses,
+                               lambda: edge_diversity(population, population[0]))
+
+            # cập nhật best
+            current_best = population[0]
+            current_cost = 1 / fits[0]
+            history.append(current_cost)
+
+            if current_cost < best_cost:
+                best = current_best
+                best_cost = current_cost
+                no_improve = 0
             else:
-                child = p1[:]
-
-            # đột biến
-            if random.random() < mutation_rate:
-                if mutation == "swap":
-                    child = mutation_Swap(child)
-                elif mutation == "inversion":
-                    child = mutation_Inversion(child)
-
-            new_pop.append(child)
-
-        # elitism
-        population = population + new_pop
-        population.sort(key=lambda ind: fitness(ind, matrix), reverse=True)
-        population = population[:pop_size]
-
-        # cập nhật best
-        current_best = population[0]
-        current_cost = 1 / fitness(current_best, matrix)
-        history.append(current_cost)
-
-        if current_cost < best_cost:
-            best = current_best
-            best_cost = current_cost
-            no_improve = 0
-        else:
-            no_improve += 1
+                no_improve += 1
 
-        if g % 20 == 0:
-            print(f"Gen {g}: cost = {best_cost}")
+            if g % 20 == 0:
+                print(f"Gen {g}: cost = {best_cost}")
 
-    return best, best_cost, history
+        tracker.end(best_cost=best_cost, generations=g)
+        return best, best_cost, history
 
 
 # ---------- Test ----------
 if __name__ == "__main__":
-    problem = tsplib95.load("data/TSP/eil51.tsp")
-    print("Số thành phố:", problem.dimension)
-
-    nodes = list(problem.get_nodes())
-    coords = np.array([problem.node_coords[i] for i in nodes])  # tọa độ cho plot
-    matrix = np.array([[problem.get_weight(i, j) for j in nodes] for i in nodes])
+    matrix, coords = load_tsp("data/TSP/eil51.tsp")  # coords: tọa độ cho plot
+    print("Số thành phố:", len(matrix))
 
     best_path, best_cost, history = GA(
         matrix,
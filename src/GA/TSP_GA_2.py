@@ -1,7 +1,6 @@
 import random
 import math
 import numpy as np
-import tsplib95
 import sys, os
 from pathlib import Path
 
@@ -13,6 +12,11 @@ if PROJECT_ROOT_STR not in sys.path:
     sys.path.insert(0, PROJECT_ROOT_STR)
     
 from utils.plot import plot_scores, plot_tour
+from utils.tsplib_io import load_tsp
+from utils.tsp_eval import tour_length, tour_lengths
+from utils.real_operators import sbx_crossover_batch, polynomial_mutation_batch, gaussian_mutation_batch
+from utils.rng import as_generator
+from utils.observer import Tracker, gene_diversity
 
 # -------- Encoding/Decoding ----------
 def decode_tour(individual):
@@ -24,12 +28,16 @@ def decode_tour(individual):
     order = np.argsort(individual)
     return order.tolist()
 
+def decode_tours(population):
+    """Giải mã cả quần thể (m, n) -> (m, n) tour bằng một lần argsort theo hàng."""
+    return np.argsort(np.asarray(population), axis=1)
+
 def tour_cost(tour, matrix):
-    cost = 0
-    for i in range(len(tour) - 1):
-        cost += matrix[tour[i]][tour[i+1]]
-    cost += matrix[tour[-1]][tour[0]]
-    return cost
+    return tour_length(tour, matrix)
+
+def population_costs(population, matrix):
+    """Độ dài tour của cả quần thể số thực (decode + đánh giá batch)."""
+    return tour_lengths(decode_tours(population), matrix).tolist()
 
 def fitness(individual, matrix):
     tour = decode_tour(individual)
@@ -135,6 +143,8 @@ def gaussian_mutation(ind, sigma=0.1, pm=None):
     return ind
 
 # -------- GA Main ----------
+_MUTATIONS = {"polynomial": polynomial_mutation_batch, "gaussian": gaussian_mutation_batch}
+
 def GA(
     matrix,
     mutation: str,
@@ -142,52 +152,75 @@ def GA(
     generations=200,
     crossover_rate=0.9,
     mutation_rate=0.1,
-    patience=100
+    patience=100,
+    seed=None,
+    observer=None
     ):
+    """
+    GA mã hóa số thực, mỗi thế hệ xử lý theo lô:
+    - Quần thể là mảng (pop_size, n); ceil(pop_size/2) cặp cha mẹ được chọn một lần
+    - SBX / polynomial / gaussian dạng batch (utils.real_operators) trên mảng (cặp, n);
+      mutation khác "polynomial" / "gaussian" -> ValueError
+    - Đánh giá con bằng decode argsort theo hàng + tour_lengths
+    seed: None / int / numpy.random.Generator (utils.rng) — cùng seed cho cùng kết quả
+    observer: utils.observer.Observer nhận event mỗi thế hệ (thời gian từng pha, số đánh giá, ...)
+    """
+    if mutation not in _MUTATIONS:
+        raise ValueError(f"Unknown mutation {mutation!r}; supported: {', '.join(_MUTATIONS)}")
+    mutate = _MUTATIONS[mutation]
+    tracker = Tracker(observer, "GA_real", pop_size=pop_size, n=len(matrix), mutation=mutation)
+    clock = tracker.clock
     n = len(matrix)
+    rng = as_generator(seed)
     # Khởi tạo quần thể: vector số thực trong [0,1]
-    population = [np.random.rand(n).tolist() for _ in range(pop_size)]
-    best = max(population, key=lambda ind: fitness(ind, matrix))
-    best_cost = tour_cost(decode_tour(best), matrix)
+    population = rng.random((pop_size, n))
+    costs = np.asarray(population_costs(population, matrix), dtype=float)
+    best_idx = int(np.argmin(costs))
+    best, best_cost = population[best_idx].copy(), float(costs[best_idx])
+    tracker.generation(0, costs, pop_size, lambda: gene_diversity(population))
 
     history = [best_cost]
     no_improve = 0  # đếm số thế hệ không cải thiện
+    pairs = (pop_size + 1) // 2
 
     for g in range(generations):
-        new_pop = []
-        while len(new_pop) < pop_size:
-            p1, p2 = random.sample(population, 2)
-            # lai ghép
-            if random.random() < crossover_rate:
-                c1, c2 = sbx_crossover(p1, p2)
-            else:
-                c1, c2 = p1[:], p2[:]
-                
-            # đột biến
-            if mutation == "polynomial":
-                if random.random() < mutation_rate:
-                    c1 = polynomial_mutation(c1)
-                if random.random() < mutation_rate:
-                    c2 = polynomial_mutation(c2)
-            elif mutation == "gaussian":
-                if random.random() < mutation_rate:
-                    c1 = gaussian_mutation(c1)
-                if random.random() < mutation_rate:
-                    c2 = gaussian_mutation(c2)
-            new_pop.append(c1)
-            new_pop.append(c2)
+        # chọn cặp cha mẹ khác nhau
+        i = rng.integers(0, pop_size, size=pairs)
+        j = rng.integers(0, pop_size - 1, size=pairs)
+        j = j + (j >= i)
+        P1, P2 = population[i], population[j]
+        clock.lap("selection")
+
+        # lai ghép
+        C1, C2 = P1.copy(), P2.copy()
+        cx = rng.random(pairs) < crossover_rate
+        if cx.any():
+            C1[cx], C2[cx] = sbx_crossover_batch(P1[cx], P2[cx], rng=rng)
+        new_pop = np.stack([C1, C2], axis=1).reshape(-1, n)
+        clock.lap("crossover")
+
+        # đột biến
+        mut = rng.random(len(new_pop)) < mutation_rate
+        if mut.any():
+            new_pop[mut] = mutate(new_pop[mut], rng=rng)
+        clock.lap("mutation")
+        new_costs = population_costs(new_pop, matrix)
+        clock.lap("evaluation")
 
         # cập nhật quần thể
-        population = population + new_pop
-        population.sort(key=lambda ind: fitness(ind, matrix), reverse=True)
-        population = population[:pop_size]
+        population = np.concatenate([population, new_pop])
+        costs = np.concatenate([costs, new_costs])
+        order = np.argsort(costs, kind="stable")[:pop_size]
+        population, costs = population[order], costs[order]
+        clock.lap("elitism")
+        tracker.generation(g + 1, costs, len(new_pop), lambda: gene_diversity(population))
         
         current_best = population[0]
-        current_cost = tour_cost(decode_tour(current_best), matrix)
+        current_cost = float(costs[0])
         history.append(current_cost)
 
         if current_cost < best_cost:
-            best, best_cost = current_best, current_cost
+            best, best_cost = current_best.copy(), current_cost
             no_improve = 0
         else:
             no_improve += 1
@@ -201,15 +234,12 @@ def GA(
             print(f"Dừng sớm tại gen {g}, không cải thiện sau {patience} thế hệ")
             break
 
+    tracker.end(best_cost=best_cost, generations=len(history) - 1)
     return decode_tour(best), best_cost, history
 
 if __name__ == "__main__":
-    problem = tsplib95.load("data/TSP/eil51.tsp")
-    print("Số thành phố:", problem.dimension)
-
-    nodes = list(problem.get_nodes())
-    coords = np.array([problem.node_coords[i] for i in nodes])  # tọa độ cho plot
-    matrix = np.array([[problem.get_weight(i, j) for j in nodes] for i in nodes])
+    matrix, coords = load_tsp("data/TSP/eil51.tsp")  # coords: tọa độ cho plot
+    print("Số thành phố:", len(matrix))
 
     # Chạy GA với polynomial mutation
     best_path, best_cost, history = GA(matrix, mutation="polynomial", pop_size=50, generations=500)
@@ -0,0 +1,233 @@
+import numpy as np
+import sys
+from pathlib import Path
+
+# Thư mục gốc project = 2 cấp trên (__file__/../..)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PROJECT_ROOT_STR = str(PROJECT_ROOT)
+
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+
+from utils.evaluator import open_evaluator
+from utils.rng import as_generator
+from utils.observer import Tracker, edge_diversity
+from src.GA.initPopulation import init_population_greedy
+
+"""
+GA hoán vị dạng mảng (engine="array" của TSP_GA_1.GA):
+- Quần thể là ma trận int32 (m, n), mỗi hàng là một tour.
+- Mọi toán tử xử lý cả lô con trong một thế hệ bằng mask/vị trí theo hàng,
+  không có phép `x not in child` O(n) bên trong vòng lặp O(n).
+- Nguồn ngẫu nhiên là numpy.random.Generator `rng` (None -> default_rng()), như utils.real_operators.
+"""
+
+def _cut_points(m, n, rng):
+    """Hai điểm cắt a < b khác nhau cho mỗi hàng (giống sorted(random.sample(range(n), 2)))."""
+    a = rng.integers(0, n, size=m)
+    b = rng.integers(0, n - 1, size=m)
+    b = b + (b >= a)
+    return np.minimum(a, b), np.maximum(a, b)
+
+
+# ---------- B2: Chọn cha mẹ (theo lô) ----------
+def selection_Tournament_batch(fits, num, k=5, rng=None):
+    """Tournament cho `num` lần chọn: mỗi lần lấy k chỉ số khác nhau, giữ chỉ số có fitness lớn nhất."""
+    rng = as_generator(rng)
+    size = len(fits)
+    k = min(k, size)
+    cand = np.argpartition(rng.random((num, size)), k - 1, axis=1)[:, :k]
+    best = np.argmax(fits[cand], axis=1)
+    return cand[np.arange(num), best]
+
+def selection_Roulette_batch(fits, num, rng=None):
+    """Roulette cho `num` lần chọn: tìm nhị phân trên tổng tích lũy fitness."""
+    rng = as_generator(rng)
+    cum = np.cumsum(fits)
+    pick = rng.random(num) * cum[-1]
+    return np.minimum(np.searchsorted(cum, pick), len(fits) - 1)
+
+
+# ---------- B3: Lai ghép (theo lô) ----------
+def crossover_OX_batch(P1, P2, rng=None):
+    """
+    Order Crossover cho cả lô cặp cha mẹ (m, n):
+    - used[r, v] = True nếu gene v nằm trong đoạn P1[r, a:b]
+    - Gene của P2 chưa dùng giữ nguyên thứ tự, thứ hạng t -> vị trí (b + t) % n
+    """
+    m, n = P1.shape
+    rows = np.arange(m)[:, None]
+    a, b = _cut_points(m, n, as_generator(rng))
+    idx = np.arange(n)[None, :]
+    seg = (idx >= a[:, None]) & (idx < b[:, None])
+
+    used = np.zeros((m, n), dtype=bool)
+    used[rows, P1] = seg
+    keep = ~used[rows, P2]
+    rank = np.cumsum(keep, axis=1) - 1
+    target = (b[:, None] + rank) % n
+
+    child = np.where(seg, P1, 0).astype(P1.dtype)
+    r, c = np.nonzero(keep)
+    child[r, target[r, c]] = P2[r, c]
+    return child
+
+def crossover_PMX_batch(P1, P2, rng=None):
+    """
+    Partially Mapped Crossover cho cả lô:
+    - child = P1 trong đoạn [a:b], P2 ngoài đoạn
+    - Gene ngoài đoạn bị trùng với đoạn copy thì dịch theo mapping P1[i] -> P2[i]
+      (lặp vector hoá cho tới khi không còn trùng).
+    """
+    m, n = P1.shape
+    rows = np.arange(m)[:, None]
+    a, b = _cut_points(m, n, as_generator(rng))
+    idx = np.arange(n)[None, :]
+    seg = (idx >= a[:, None]) & (idx < b[:, None])
+
+    inseg = np.zeros((m, n), dtype=bool)
+    inseg[rows, P1] = seg
+    mapping = np.empty_like(P1)
+    mapping[rows, P1] = np.where(seg, P2, P1)
+
+    child = np.where(seg, P1, P2)
+    bad = ~seg & inseg[rows, child]
+    while bad.any():
+        r, c = np.nonzero(bad)
+        child[r, c] = mapping[r, child[r, c]]
+        bad[r, c] = inseg[r, child[r, c]]
+    return child
+
+
+# ---------- B4: Đột biến (theo lô, tại chỗ) ----------
+def mutation_Swap_batch(children, rows, rng=None):
+    """Swap trên các hàng `rows`: hoán đổi 2 vị trí khác nhau của mỗi hàng."""
+    if len(rows) == 0:
+        return children
+    rng = as_generator(rng)
+    n = children.shape[1]
+    a = rng.integers(0, n, size=len(rows))
+    b = rng.integers(0, n - 1, size=len(rows))
+    b = b + (b >= a)
+    tmp = children[rows, a].copy()
+    children[rows, a] = children[rows, b]
+    children[rows, b] = tmp
+    return children
+
+def mutation_Inversion_batch(children, rows, rng=None):
+    """Inversion trên các hàng `rows`: đảo đoạn [a:b) bằng mảng chỉ số nguồn."""
+    if len(rows) == 0:
+        return children
+    n = children.shape[1]
+    a, b = _cut_points(len(rows), n, as_generator(rng))
+    idx = np.arange(n)[None, :]
+    inside = (idx >= a[:, None]) & (idx < b[:, None])
+    src = np.where(inside, a[:, None] + b[:, None] - 1 - idx, idx)
+    children[rows] = np.take_along_axis(children[rows], src, axis=1)
+    return children
+
+
+_SELECTIONS = {"tournament": selection_Tournament_batch, "roulette": selection_Roulette_batch}
+_CROSSOVERS = {"ox": crossover_OX_batch, "pmx": crossover_PMX_batch}
+_MUTATIONS = {"swap": mutation_Swap_batch, "inversion": mutation_Inversion_batch}
+
+def _operator(table, name, kind):
+    """Tra toán tử theo tên; tên không có bản theo lô (vd. crossover "erx") -> ValueError nêu các tên hỗ trợ."""
+    if name not in table:
+        raise ValueError(f"engine='array' does not support {kind} {name!r}; supported: {', '.join(table)}")
+    return table[name]
+
+
+# ---------- GA dạng mảng ----------
+def GA_array(
+    matrix,
+    selection_parent: str,
+    crossover: str,
+    mutation: str,
+    pop_size=50,
+    crossover_rate=0.9,
+    mutation_rate=0.1,
+    patience=100,
+    evaluator="serial",
+    workers=None,
+    seed=None,
+    observer=None
+):
+    """
+    Cùng chữ ký / kết quả với TSP_GA_1.GA nhưng mỗi thế hệ là vài phép toán mảng:
+    - B1: Khởi tạo (greedy + 2-opt) -> ma trận int32 (pop_size, n)
+    - B2: Chọn 2*pop_size chỉ số cha mẹ một lần
+    - B3: Lai ghép các hàng được chọn (xác suất crossover_rate), còn lại copy P1
+      (chỉ OX / PMX có bản theo lô; crossover khác -> ValueError)
+    - B4: Đột biến các hàng được chọn (xác suất mutation_rate)
+    - B5: Đánh giá cả lô con bằng evaluator (serial/thread/process), elitism bằng argsort trên cha+con
+    seed: None / int / numpy.random.Generator — mọi toán tử rút số từ cùng một Generator.
+    observer: utils.observer.Observer nhận event mỗi thế hệ (thời gian từng pha, số đánh giá, ...).
+    """
+    select = _operator(_SELECTIONS, selection_parent, "selection")
+    cross = _operator(_CROSSOVERS, crossover, "crossover")
+    mutate = _operator(_MUTATIONS, mutation, "mutation")
+    tracker = Tracker(observer, "GA_array", pop_size=pop_size, n=len(matrix), selection=selection_parent,
+                      crossover=crossover, mutation=mutation)
+    clock = tracker.clock
+    rng = as_generator(seed)
+    n = len(matrix)
+
+    population = np.array(init_population_greedy(
+        pop_size,
+        num_genes=n,
+        distance_matrix=matrix,
+        alpha=0.5,
+        use_2opt=True,
+        rng=rng
+    ), dtype=np.int32)
+    with open_evaluator(matrix, evaluator, workers) as ev:
+        costs = ev.tour_lengths(population).astype(float)
+        best = population[np.argmin(costs)].copy()
+        best_cost = float(costs.min())
+        tracker.generation(0, costs, len(population), lambda: edge_diversity(population, best))
+
+        history = [best_cost]
+        no_improve = 0
+        g = 0
+
+        while no_improve < patience:
+            g += 1
+            fits = 1.0 / (costs + 1e-9)
+            P1 = population[select(fits, pop_size, rng=rng)]
+            P2 = population[select(fits, pop_size, rng=rng)]
+            clock.lap("selection")
+
+            children = P1.copy()
+            cx = rng.random(pop_size) < crossover_rate
+            if cx.any():
+                children[cx] = cross(P1[cx], P2[cx], rng=rng)
+            clock.lap("crossover")
+            mutate(children, np.flatnonzero(rng.random(pop_size) < mutation_rate), rng=rng)
+            clock.lap("mutation")
+            child_costs = ev.tour_lengths(children)
+            clock.lap("evaluation")
+
+            # elitism
+            all_pop = np.concatenate([population, children])
+            all_costs = np.concatenate([costs, child_costs])
+            order = np.argsort(all_costs, kind="stable")[:pop_size]
+            population, costs = all_pop[order], all_costs[order]
+            clock.lap("elitism")
+            tracker.generation(g, costs, len(children), lambda: edge_diversity(population, population[0]))
+
+            current_cost = float(costs[0])
+            history.append(current_cost)
+
+            if current_cost < best_cost:
+                best = population[0].copy()
+                best_cost = current_cost
+                no_improve = 0
+            else:
+                no_improve += 1
+
+            if g % 20 == 0:
+                print(f"Gen {g}: cost = {best_cost}")
+
+        tracker.end(best_cost=best_cost, generations=g)
+        return best.tolist(), best_cost, history
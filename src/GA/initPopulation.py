@@ -1,100 +1,104 @@
-import random
 import math
+import numpy as np
 
-def _nearest_neighbor_tour(n, dist, start, alpha=0.0):
+from utils.local_search import two_opt, or_3opt, neighbor_lists
+from utils.rng import as_generator
+
+def _grasp_tours(dist, starts, alpha=0.0, rng=None):
+    """
+    Dựng cùng lúc k tour Nearest Neighbor / GRASP, mỗi hàng một start:
+    - hàng khoảng cách dist[cur] (k, n) cộng mặt nạ phạt (k, n): đỉnh đã thăm = inf
+    - alpha = 0: argmin theo hàng (NN thuần, hoà thì lấy chỉ số nhỏ nhất như bản cũ)
+    - alpha > 0: RCL = m = ceil(alpha * số đỉnh chưa thăm) đỉnh gần nhất (argpartition),
+      chọn ngẫu nhiên một cột trong RCL. m giống nhau ở mọi hàng vì các tour dài bằng nhau.
+    dist có thể là ma trận dày (ndarray số nguyên / thực, list lồng nhau) hoặc DistanceOracle.
+    Trả về mảng int (k, n).
+    """
+    rng = as_generator(rng)
+    if not hasattr(dist, "rows"):   # DistanceOracle giữ nguyên (đọc hàng theo yêu cầu)
+        dist = np.asarray(dist, dtype=float)   # ép một lần: np.take(out=d) cần cùng dtype float
+    n = dist.shape[0]
+    cur = np.asarray(starts, dtype=np.int64)
+    k = len(cur)
+    rows = np.arange(k)
+    penalty = np.zeros((k, n))
+    penalty[rows, cur] = np.inf
+    d = np.empty((k, n))
+    tours = np.empty((k, n), dtype=np.int64)
+    tours[:, 0] = cur
+    for step in range(1, n):
+        if isinstance(dist, np.ndarray):
+            np.take(dist, cur, axis=0, out=d)
+        else:
+            d[...] = dist[cur]
+        d += penalty
+        left = n - step
+        m = max(1, int(math.ceil(alpha * left))) if alpha > 0.0 and left > 1 else 1
+        if m == 1:
+            nxt = np.argmin(d, axis=1)
+        else:
+            rcl = np.argpartition(d, m - 1, axis=1)
+            nxt = rcl[rows, rng.integers(0, m, size=k)]
+        penalty[rows, nxt] = np.inf
+        tours[:, step] = nxt
+        cur = nxt
+    return tours
+
+def _nearest_neighbor_tour(n, dist, start, alpha=0.0, rng=None):
     """
     Tạo tour bằng Nearest Neighbor:
     - start: đỉnh bắt đầu
     - alpha ∈ [0,1]: mức ngẫu nhiên hoá (GRASP). 0 => chọn gần nhất tuyệt đối.
       >0 => chọn ngẫu nhiên trong danh sách ứng viên tốt (RCL).
     """
-    unvis = list(range(n))
-    tour = [start]
-    unvis.remove(start)
+    return _grasp_tours(dist, [start], alpha, rng)[0].tolist()
 
-    while unvis:
-        last = tour[-1]
-        # khoảng cách tới các đỉnh chưa thăm
-        cand = sorted(unvis, key=lambda j: dist[last][j])
-        if alpha > 0.0 and len(cand) > 1:
-            # RCL: các ứng viên trong top m dựa trên alpha
-            m = max(1, int(math.ceil(alpha * len(cand))))
-            nxt = random.choice(cand[:m])
-        else:
-            nxt = cand[0]
-        tour.append(nxt)
-        unvis.remove(nxt)
-    return tour
-
-def _two_opt_cost_change(dist, tour, i, k):
-    """Lợi ích khi đảo đoạn [i+1..k] (chuẩn 2-opt)."""
-    n = len(tour)
-    a, b = tour[i], tour[(i+1) % n]
-    c, d = tour[k], tour[(k+1) % n]
-    return (dist[a][c] + dist[b][d]) - (dist[a][b] + dist[c][d])
-
-def _two_opt(dist, tour, max_swaps=200):
-    """Cải thiện tour bằng 2-opt đơn giản (giới hạn số swap)."""
-    n = len(tour)
-    swaps = 0
-    improved = True
-    while improved and swaps < max_swaps:
-        improved = False
-        for i in range(n - 1):
-            for k in range(i + 1, n - (0 if i > 0 else 1)):
-                delta = _two_opt_cost_change(dist, tour, i, k)
-                if delta < 0:  # giảm chi phí
-                    tour[i+1:k+1] = reversed(tour[i+1:k+1])
-                    swaps += 1
-                    improved = True
-                    if swaps >= max_swaps:
-                        break
-            if swaps >= max_swaps:
-                break
-    return tour
+def _two_opt(dist, tour, max_swaps=200, neighbors=None):
+    """Cải thiện tour bằng 2-opt (neighbor list + don't-look bits, giới hạn số swap)."""
+    return two_opt(tour, dist, neighbors=neighbors, max_moves=max_swaps)
 
 def init_population_greedy(pop_size, num_genes, distance_matrix=None,
-                           alpha=0.0, use_2opt=False):
+                           alpha=0.0, use_2opt=False, use_oropt=False, rng=None):
     """
     Khởi tạo quần thể TSP chất lượng bằng tham lam:
     - distance_matrix: ma trận khoảng cách (bắt buộc để dùng tham lam). Nếu None -> fallback random.
     - alpha ∈ [0,1]: GRASP randomness (0 = thuần NN; 0.2..0.4 gợi ý để đa dạng).
     - use_2opt: True để local search nhanh sau khi có tour NN.
+    - use_oropt: True để chạy Or-3opt (2-opt + Or-opt) thay cho 2-opt đơn.
+    - rng: seed hoặc numpy.random.Generator (utils.rng.as_generator).
+    Mọi tour được dựng cùng lúc bằng _grasp_tours (một lô pop_size hàng).
     Trả về: list[list[int]] kích thước pop_size.
     """
+    rng = as_generator(rng)
     population = []
 
     if distance_matrix is None:
         # fallback: random hoán vị
         for _ in range(pop_size):
-            ind = list(range(num_genes))
-            random.shuffle(ind)
-            population.append(ind)
+            population.append(rng.permutation(num_genes).tolist())
         return population
 
     n = num_genes
-    starts = list(range(n))
-    random.shuffle(starts)
-
-    # đảm bảo có đủ số cá thể (lặp lại start + tạo thêm bằng alpha khác)
-    while len(population) < pop_size:
-        if starts:
-            s = starts.pop()
-        else:
-            s = random.randrange(n)
+    starts = rng.permutation(n).tolist()
 
-        tour = _nearest_neighbor_tour(n, distance_matrix, start=s, alpha=alpha)
-        if use_2opt:
-            tour = _two_opt(distance_matrix, tour, max_swaps=200)
+    # start cho từng cá thể (lặp lại start + tạo thêm bằng alpha khác):
+    # alpha > 0 -> mỗi start cho thêm 1 tour biến thể (2-opt ngắn hơn)
+    plan = []
+    while len(plan) < pop_size:
+        s = starts.pop() if starts else int(rng.integers(n))
+        plan.append((s, 200))
+        if alpha > 0.0:
+            plan.append((s, 120))
+    plan = plan[:pop_size]
 
+    if not hasattr(distance_matrix, "rows"):   # list / ndarray int -> ndarray float một lần
+        distance_matrix = np.asarray(distance_matrix, dtype=float)
+    tours = _grasp_tours(distance_matrix, [s for s, _ in plan], alpha=alpha, rng=rng).tolist()
+    nbrs = neighbor_lists(distance_matrix) if use_oropt or use_2opt else None   # dựng một lần cho cả quần thể
+    for tour, (_, swaps) in zip(tours, plan):
+        if use_oropt:
+            tour = or_3opt(tour, distance_matrix, neighbors=nbrs)
+        elif use_2opt:
+            tour = _two_opt(distance_matrix, tour, max_swaps=swaps, neighbors=nbrs)
         population.append(tour)
-
-        # thêm đa dạng: có thể tạo thêm 1–2 tour biến thể từ cùng start khi cần
-        if len(population) < pop_size and alpha > 0.0:
-            tour2 = _nearest_neighbor_tour(n, distance_matrix, start=s, alpha=alpha)
-            if use_2opt:
-                tour2 = _two_opt(distance_matrix, tour2, max_swaps=120)
-            population.append(tour2)
-
-    # cắt đúng kích thước
-    return population[:pop_size]
\ No newline at end of file
+    return population
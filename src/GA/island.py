@@ -0,0 +1,189 @@
+import queue
+import random
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import sys
+from pathlib import Path
+
+# Thư mục gốc project = 2 cấp trên (__file__/../..)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PROJECT_ROOT_STR = str(PROJECT_ROOT)
+
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+
+from src.GA.TSP_GA_1 import FitnessCache, next_generation
+from src.GA.initPopulation import init_population_greedy
+from utils.local_search import or_3opt, two_opt, neighbor_lists
+from utils.rng import as_generator, spawn, py_random
+
+"""
+Island model GA:
+- N quần thể độc lập, mỗi đảo chạy trong một process riêng với các toán tử của TSP_GA_1
+  (selection / crossover / mutation theo tên, như GA).
+- Ma trận khoảng cách đặt một lần trong shared memory, các đảo gắn vào (không pickle);
+  DistanceOracle thì chỉ gửi tọa độ.
+- Cứ `migrate_every` thế hệ, mỗi đảo gửi `migrants` tour tốt nhất sang đảo đích
+  (topology "ring": i -> i+1, "random": hoán vị không điểm bất động, giống nhau ở mọi đảo)
+  và thay các cá thể tệ nhất bằng tour nhận được.
+"""
+
+def _migration_targets(num_islands, topology, epoch, topo_seed):
+    """Đảo đích của mỗi đảo ở lượt di cư `epoch` (mỗi đảo nhận đúng 1 gói)."""
+    if topology == "ring":
+        return [(i + 1) % num_islands for i in range(num_islands)]
+    rng = random.Random(topo_seed * 1000003 + epoch)
+    while True:
+        perm = list(range(num_islands))
+        rng.shuffle(perm)
+        if all(perm[i] != i for i in range(num_islands)):
+            return perm
+
+def _local_search(population, matrix, kind, nbrs):
+    if kind == "or3opt":
+        return [or_3opt(t, matrix, neighbors=nbrs) for t in population]
+    if kind == "2opt":
+        return [two_opt(t, matrix, neighbors=nbrs) for t in population]
+    return population
+
+def _island_worker(idx, shared, init_pop, params, inboxes, results, rng, topo_seed):
+    # shared = (tên shared memory, shape, dtype) cho ma trận dày, hoặc một DistanceOracle
+    shm = None
+    if isinstance(shared, tuple):
+        shm_name, shape, dtype = shared
+        shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        matrix = np.ndarray(shape, dtype=dtype, buffer=shm.buf) if shm is not None else shared
+        # rng: Generator con riêng của đảo (utils.rng.spawn), toán tử list dùng random.Random gieo từ nó
+        py_rng = py_random(rng)
+
+        pop_size = params["pop_size"]
+        n = matrix.shape[0]
+        population = [list(t) for t in init_pop[:pop_size]]
+        if len(population) < pop_size:
+            population += init_population_greedy(pop_size - len(population), num_genes=n,
+                                                 distance_matrix=matrix, alpha=0.5, use_2opt=True,
+                                                 rng=rng)
+        nbrs = neighbor_lists(matrix) if params["local_search"] else None
+        cache = FitnessCache(matrix, maxsize=params["cache_size"])
+        fits = cache.batch(population)
+        order = sorted(range(pop_size), key=lambda i: fits[i], reverse=True)
+        population, fits = [population[i] for i in order], [fits[i] for i in order]
+
+        history = [1 / fits[0]]
+        pending = {}
+        num_islands = len(inboxes)
+        for g in range(1, params["generations"] + 1):
+            population, fits = next_generation(
+                population, fits, matrix, cache, params["selection_parent"], params["crossover"],
+                params["mutation"], pop_size, params["crossover_rate"], params["mutation_rate"], py_rng
+            )
+            history.append(1 / fits[0])
+
+            if g % params["migrate_every"] == 0 and g < params["generations"] and num_islands > 1:
+                epoch = g // params["migrate_every"]
+                target = _migration_targets(num_islands, params["topology"], epoch, topo_seed)[idx]
+                inboxes[target].put((epoch, [t[:] for t in population[:params["migrants"]]]))
+                # gói của các lượt sau có thể tới sớm -> giữ lại theo epoch
+                while epoch not in pending:
+                    e, tours = inboxes[idx].get()
+                    pending[e] = tours
+                incoming = _local_search(pending.pop(epoch), matrix, params["local_search"], nbrs)
+
+                keep = pop_size - len(incoming)
+                population = population[:keep] + incoming
+                fits = fits[:keep] + cache.batch(incoming)
+                order = sorted(range(pop_size), key=lambda i: fits[i], reverse=True)
+                population, fits = [population[i] for i in order], [fits[i] for i in order]
+                print(f"[Island {idx}] Gen {g}: cost = {1 / fits[0]}")
+
+        results.put((idx, population[0], 1 / fits[0], history))
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+def island_GA(
+    matrix,
+    selection_parent: str,
+    crossover: str,
+    mutation: str,
+    num_islands=4,
+    pop_size=50,
+    generations=500,
+    migrate_every=25,
+    migrants=2,
+    topology="ring",
+    crossover_rate=0.9,
+    mutation_rate=0.1,
+    local_search=None,
+    init_pop=None,
+    cache_size=10000,
+    seed=None
+):
+    """
+    Chạy `num_islands` GA song song (mỗi đảo một process), di cư định kỳ.
+    - topology: "ring" hoặc "random"; migrants: số tour tốt nhất gửi đi mỗi lượt
+    - local_search: None / "2opt" / "or3opt" áp dụng cho tour di cư khi tới đảo mới
+    - init_pop: danh sách tour khởi tạo (chia đều theo đảo, thiếu thì bổ sung bằng greedy)
+    - seed: None / int / numpy.random.Generator gốc; mỗi đảo nhận một luồng con độc lập (utils.rng.spawn)
+    Trả về: (best, best_cost, histories) — histories[i] là lịch sử best cost của đảo i.
+    """
+    init_pop = init_pop or []
+    params = dict(
+        selection_parent=selection_parent, crossover=crossover, mutation=mutation,
+        pop_size=pop_size, generations=generations, migrate_every=migrate_every,
+        migrants=min(migrants, pop_size), topology=topology, crossover_rate=crossover_rate,
+        mutation_rate=mutation_rate, local_search=local_search, cache_size=cache_size,
+    )
+    root = as_generator(seed)
+    topo_seed = int(root.integers(2 ** 31))
+    island_rngs = spawn(root, num_islands)
+
+    shm = None
+    if isinstance(matrix, (np.ndarray, list)):
+        matrix = np.ascontiguousarray(matrix)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, matrix.nbytes))
+        np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf)[...] = matrix
+        shared = (shm.name, matrix.shape, matrix.dtype.str)
+    else:
+        shared = matrix   # DistanceOracle: chỉ pickle tọa độ
+    try:
+        ctx = mp.get_context()
+        inboxes = [ctx.Queue() for _ in range(num_islands)]
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(
+                target=_island_worker,
+                args=(i, shared, init_pop[i::num_islands], params,
+                      inboxes, results, island_rngs[i], topo_seed),
+            )
+            for i in range(num_islands)
+        ]
+        for p in procs:
+            p.start()
+        # lấy kết quả trước khi join để tránh kẹt queue
+        outputs = {}
+        while len(outputs) < num_islands:
+            try:
+                idx, best, best_cost, history = results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [i for i, p in enumerate(procs) if p.exitcode not in (None, 0)]
+                if dead:
+                    for p in procs:
+                        p.terminate()
+                    raise RuntimeError(f"Island process(es) {dead} exited with an error")
+                continue
+            outputs[idx] = (best, best_cost, history)
+        for p in procs:
+            p.join()
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    histories = [outputs[i][2] for i in range(num_islands)]
+    best_idx = min(range(num_islands), key=lambda i: outputs[i][1])
+    best, best_cost, _ = outputs[best_idx]
+    return best, best_cost, histories
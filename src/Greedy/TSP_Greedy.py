@@ -1,13 +1,19 @@
-import tsplib95
+import sys
+from pathlib import Path
 
-if __name__ == "__main__":
-    problem = tsplib95.load(r"data/eil51.tsp")
-    print("Số thành phố:", problem.dimension)
+# Thư mục gốc project = 2 cấp trên (__file__/../..)
+PROJECT_ROOT_STR = str(Path(__file__).resolve().parents[2])
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+
+from utils.tsp_eval import tour_length
+from utils.tsplib_io import load_tsp
 
-    # Tạo ma trận khoảng cách theo thứ tự node 1..n -> index 0..n-1
-    nodes = list(problem.get_nodes())   # [1..n]
-    n = len(nodes)
-    matrix = [[problem.get_weight(i, j) for j in nodes] for i in nodes]
+if __name__ == "__main__":
+    # Tạo ma trận khoảng cách theo thứ tự node 1..n -> index 0..n-1 (cache .npy sau lần đầu)
+    matrix, _ = load_tsp(r"data/eil51.tsp")
+    n = len(matrix)
+    print("Số thành phố:", n)
 
     result = []
     visited = [False] * n
@@ -34,10 +40,7 @@ if __name__ == "__main__":
         visited[next_idx] = True
         current = next_idx
 
-    cost = 0
-    for i in range(len(result) - 1):
-        cost += matrix[result[i]][result[i + 1]]
-    cost += matrix[result[-1]][result[0]]
+    cost = tour_length(result, matrix)
 
     print("Tour (0-based indices):", result)
     print("Tour (city IDs 1-based):", [x + 1 for x in result])
@@ -2,7 +2,6 @@ from pathlib import Path
 import sys
 from mfea.mfea_core import mfea_tsp_knapsack
 import numpy as np
-import tsplib95
 import os
 
 from mfea.tasks import decode_knapsack_fill, decode_tsp
@@ -14,14 +13,12 @@ if PROJECT_ROOT_STR not in sys.path:
     sys.path.insert(0, PROJECT_ROOT_STR)
     
 from utils.plot import plot_scores
+from utils.tsplib_io import load_tsp
 
 def tsp_data(path):
-    problem = tsplib95.load(path)
-    print("Số thành phố:", problem.dimension)
-
-    nodes = list(problem.get_nodes())
-    matrix = [[problem.get_weight(i, j) for j in nodes] for i in nodes]
-    return np.array(matrix)
+    matrix, _ = load_tsp(path)
+    print("Số thành phố:", len(matrix))
+    return matrix
 
 def knapsack_data(path):
     values, weights = [], []
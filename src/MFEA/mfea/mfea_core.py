@@ -1,12 +1,240 @@
 import numpy as np
 import random
+from contextlib import ExitStack
 from .operators import sbx_crossover, gaussian_mutation, random_parents_mfea, polynomial_mutation
+from .operators import random_parents_mfea_batch, sbx_crossover_batch, polynomial_mutation_batch
 from .tasks import fitness_tsp, fitness_knapsack, fitness
+from .tasks import TSPTask, KnapsackTask
+from utils.rng import as_generator
+from utils.observer import Tracker, gene_diversity
+
+
+def _factorial_ranks(fit, sf, num_tasks):
+    """
+    Factorial rank của mỗi cá thể trên task của nó (1 = tốt nhất trong task).
+    Cá thể chỉ được đánh giá trên skill factor -> min_j r_ij chính là hạng trong task của nó.
+    """
+    rank = np.empty(len(fit))
+    for task in range(num_tasks):
+        idx = np.flatnonzero(sf == task)
+        rank[idx[np.argsort(-fit[idx], kind="stable")]] = np.arange(1, len(idx) + 1)
+    return rank
+
+
+def _intra_mates(i1, task_of_i1, sf_pop, rng):
+    """Bạn lai cùng task cho các hàng `i1` (khác chính nó nếu task có > 1 cá thể)."""
+    mates = i1.copy()
+    for task in np.unique(task_of_i1):
+        rows = np.flatnonzero(task_of_i1 == task)
+        members = np.flatnonzero(sf_pop == task)
+        if len(members) < 2:
+            continue   # chỉ còn 1 cá thể -> tự lai (SBX giữ nguyên, chỉ còn đột biến)
+        pos = np.searchsorted(members, i1[rows])
+        r = rng.integers(0, len(members) - 1, size=len(rows))
+        mates[rows] = members[r + (r >= pos)]
+    return mates
+
+
+def _update_rmp(R, sf_child, sf_other, success, lr, bounds):
+    """
+    Cập nhật ma trận RMP (K, K) từ một thế hệ:
+    - R[a, b]: xác suất cho task a nhận lai từ task b (con bắt chước a, cha/mẹ còn lại thuộc b)
+    - tỉ lệ thành công = con tốt hơn cha/mẹ mà nó bắt chước; so với tỉ lệ của con cùng task a:
+        q = cross / (cross + intra), R[a, b] <- (1 - lr) R[a, b] + lr q, kẹp trong `bounds`
+    """
+    K = len(R)
+    n = np.zeros((K, K))
+    hit = np.zeros((K, K))
+    np.add.at(n, (sf_child, sf_other), 1)
+    np.add.at(hit, (sf_child, sf_other), success)
+    rate = np.divide(hit, n, out=np.zeros_like(hit), where=n > 0)
+    intra = np.diag(rate)[:, None]
+    denom = rate + intra
+    seen = (n > 0) & (denom > 0) & ~np.eye(K, dtype=bool)
+    q = np.divide(rate, denom, out=np.zeros_like(rate), where=denom > 0)
+    R[seen] = np.clip((1 - lr) * R[seen] + lr * q[seen], *bounds)
+    return R
+
+
+def mfea(tasks, pop_size=50, rmp=0.2, patience=200, max_gens=10000, pairs=None, verbose=True,
+         rmp_lr=0.1, rmp_bounds=(0.05, 0.95), seed=None, observer=None):
+    """
+    MFEA cho K task bất kỳ (mfea.tasks.Task: TSPTask, KnapsackTask, ...):
+    - Một quần thể chung [0,1]^D, D = max dim của các task
+    - Khởi tạo: đánh giá mọi cá thể trên mọi task (một lần), skill factor = argmin factorial rank
+    - Mỗi thế hệ: `pairs` cặp (mặc định pop_size // 2), lai cross-task với xác suất rmp,
+      con bắt chước skill factor của cha hoặc mẹ và chỉ được đánh giá trên task đó
+    - rmp: số cố định hoặc "adaptive" — ma trận RMP (K, K) học online từ tỉ lệ con lai khác task
+      tốt hơn cha/mẹ (so với con cùng task), tốc độ rmp_lr, kẹp trong rmp_bounds
+    - Cặp khác task bị từ chối: rmp cố định -> bỏ cặp (không cặp nào còn lại -> bỏ qua thế hệ);
+      rmp="adaptive" -> cha/mẹ đầu lai với một cá thể cùng task (luôn đủ 2*pairs con, để R ở
+      cận dưới không làm cạn số con)
+    - Chọn lọc: scalar fitness = 1 / factorial rank, giữ top pop_size (argpartition)
+    - seed: None / int / numpy.random.Generator (utils.rng) — cùng seed cho cùng kết quả
+    - observer: utils.observer.Observer; event mỗi thế hệ có best / mean là list theo task
+      (task.report), thêm "rmp" (ma trận R) khi rmp="adaptive"
+    Bộ nhớ: bộ đệm (pop_size + 2*pairs, D) + O(K) cho best mỗi task.
+    Trả về: (best_inds, best_fits, histories) — histories[k] là task.report(best) mỗi thế hệ.
+    """
+    tracker = Tracker(observer, "MFEA", pop_size=pop_size, tasks=[task.name for task in tasks], rmp=rmp)
+    clock = tracker.clock
+    K = len(tasks)
+    D = max(task.dim for task in tasks)
+    pairs = pairs or max(1, pop_size // 2)
+    rng = as_generator(seed)
+    adaptive = rmp == "adaptive"
+    R = np.full((K, K), 0.3 if adaptive else float(rmp))
+    np.fill_diagonal(R, 1.0)
+
+    # Bộ đệm cấp phát một lần: hàng [0, pop_size) là quần thể, [pop_size, pop_size + 2*pairs) là con.
+    # Mỗi thế hệ chỉ ghi con vào phần đuôi, đánh giá theo mask từng task và chọn lọc bằng argpartition.
+    cap = pop_size + 2 * pairs
+    pop_buf = np.empty((cap, D))
+    fit_buf = np.empty(cap)
+    sf_buf  = np.empty(cap, dtype=int)
+
+    best_fit = np.full(K, -np.inf)
+    best_ind = [None] * K
+
+    def evaluate(lo, hi):
+        """Fitness cho các hàng [lo, hi): mỗi task một lần gọi batch trên mask của nó."""
+        sf = sf_buf[lo:hi]
+        for k, task in enumerate(tasks):
+            mask = sf == k
+            if np.any(mask):
+                fit_buf[lo:hi][mask] = task.fitness_batch(pop_buf[lo:hi][mask])
+
+    def update_best(lo, hi):
+        """Cập nhật cá thể tốt nhất của từng task từ các hàng [lo, hi); trả về True nếu có cải thiện."""
+        improved = False
+        sf, fit = sf_buf[lo:hi], fit_buf[lo:hi]
+        for k in range(K):
+            idx = np.flatnonzero(sf == k)
+            if len(idx) == 0:
+                continue
+            i = idx[np.argmax(fit[idx])]
+            if fit[i] > best_fit[k]:
+                best_fit[k] = fit[i]
+                best_ind[k] = pop_buf[lo + i].copy()
+                improved = True
+        return improved
+
+    def track(gen, evals):
+        """Event cho observer: best / mean (task.report) của từng task trên quần thể hiện tại."""
+        if not tracker.active:
+            return
+        sf, fit = sf_buf[:pop_size], fit_buf[:pop_size]
+        best = [float(task.report(best_fit[k])) if best_fit[k] != -np.inf else None
+                for k, task in enumerate(tasks)]
+        mean = [float(np.mean(task.report(fit[sf == k]))) if np.any(sf == k) else None
+                for k, task in enumerate(tasks)]
+        extra = dict(rmp=R.tolist()) if adaptive else {}
+        tracker.generation(gen, evals=evals, diversity=lambda: gene_diversity(pop_buf[:pop_size]),
+                           best=best, mean=mean, **extra)
+
+    with ExitStack() as stack:
+        for task in tasks:
+            stack.enter_context(task.running())
+
+        # Init population: đánh giá trên mọi task, skill factor = task có factorial rank nhỏ nhất
+        pop_buf[:pop_size] = rng.random((pop_size, D))
+        all_fit = np.stack([task.fitness_batch(pop_buf[:pop_size]) for task in tasks], axis=1)
+        all_rank = np.empty_like(all_fit)
+        for k in range(K):
+            all_rank[np.argsort(-all_fit[:, k], kind="stable"), k] = np.arange(1, pop_size + 1)
+        # hòa hạng -> chọn task ngẫu nhiên
+        sf_buf[:pop_size] = np.argmin(all_rank + 0.5 * rng.random(all_rank.shape), axis=1)
+        fit_buf[:pop_size] = all_fit[np.arange(pop_size), sf_buf[:pop_size]]
+        update_best(0, pop_size)
+        track(0, pop_size * K)
+
+        # Vòng lặp tiến hóa
+        no_improve = 0
+        gen = 0
+        histories = [[] for _ in range(K)]
+
+        while no_improve < patience and gen < max_gens:
+            gen += 1
+
+            # chọn `pairs` cặp cha mẹ một lần
+            i1, i2 = random_parents_mfea_batch(pop_size, pairs, rng)
+            sf1, sf2 = sf_buf[i1], sf_buf[i2]
+
+            # lai ghép cross-task với xác suất trung bình R[sf1, sf2], R[sf2, sf1]
+            accept = rng.random(pairs) <= 0.5 * (R[sf1, sf2] + R[sf2, sf1])
+            if adaptive:
+                # bị từ chối -> thay cha/mẹ thứ hai bằng một cá thể cùng task với cha/mẹ đầu
+                reject = np.flatnonzero(~accept)
+                if len(reject):
+                    i2[reject] = _intra_mates(i1[reject], sf1[reject], sf_buf[:pop_size], rng)
+            else:
+                if not np.any(accept):
+                    # không sinh được con (rmp quá nhỏ) → bỏ qua thế hệ
+                    no_improve += 1
+                    clock.lap("selection")
+                    track(gen, 0)
+                    continue
+                i1, i2 = i1[accept], i2[accept]
+            m = 2 * len(i1)
+            total = pop_size + m
+            clock.lap("selection")
+            c1, c2 = sbx_crossover_batch(pop_buf[i1], pop_buf[i2], rng=rng)
+            clock.lap("crossover")
+
+            # đột biến, ghi con xen kẽ (c1, c2) vào phần đuôi bộ đệm
+            pop_buf[pop_size:total:2] = polynomial_mutation_batch(c1, rng=rng)
+            pop_buf[pop_size + 1:total:2] = polynomial_mutation_batch(c2, rng=rng)
+
+            # Set up SKILL FACTOR for child (bắt chước ngẫu nhiên cha hoặc mẹ)
+            pair_idx = np.repeat(np.stack([i1, i2], axis=1), 2, axis=0)
+            pick = rng.integers(0, 2, size=m)
+            imitated, other = pair_idx[np.arange(m), pick], pair_idx[np.arange(m), 1 - pick]
+            sf_buf[pop_size:total] = sf_buf[imitated]
+            clock.lap("mutation")
+
+            # Evaluate FITNESS for child (theo mask từng task)
+            evaluate(pop_size, total)
+            improved = update_best(pop_size, total)
+            clock.lap("evaluation")
+
+            if adaptive:
+                success = fit_buf[pop_size:total] > fit_buf[imitated]
+                _update_rmp(R, sf_buf[imitated], sf_buf[other], success, rmp_lr, rmp_bounds)
+
+            # Chọn lọc theo scalar fitness 1/rank (hòa hạng giữa các task -> ngẫu nhiên)
+            rank = _factorial_ranks(fit_buf[:total], sf_buf[:total], K)
+            keep = np.argpartition(rank + 0.5 * rng.random(total), pop_size - 1)[:pop_size]
+            pop_buf[:pop_size] = pop_buf[keep]
+            fit_buf[:pop_size] = fit_buf[keep]
+            sf_buf[:pop_size] = sf_buf[keep]
+            clock.lap("elitism")
+            track(gen, m)
+
+            # Lịch sử (best mỗi task luôn được giữ lại: hạng 1)
+            for k, task in enumerate(tasks):
+                histories[k].append(task.report(best_fit[k]) if best_fit[k] != -np.inf else 0.0)
+
+            no_improve = 0 if improved else no_improve + 1
+
+            if verbose and gen % 10 == 0:
+                scores = "  |  ".join(f"{task.name}={best_fit[k]:.6f}" for k, task in enumerate(tasks))
+                print(f"[Gen {gen:04d}]  {scores}  |  no_improve={no_improve}")
+
+    if verbose:
+        print(f"\n Dừng sau {gen} thế hệ (no_improve={no_improve})")
+        for k, task in enumerate(tasks):
+            print(f"   Best {task.name}: {task.report(best_fit[k]):.6f}")
+        if adaptive:
+            print("   RMP:", np.round(R, 3).tolist())
+
+    tracker.end(best_fit=best_fit.tolist(), generations=gen)
+    return best_ind, best_fit, histories
 
 
 def mfea_tsp_knapsack(dist_matrix, values, weights, capacity,
                       pop_size=50, rmp=0.2, 
-                      patience=200, max_gens=10000):
+                      patience=200, max_gens=10000,
+                      evaluator="serial", workers=None, seed=None, observer=None):
     """
     Multifactorial Evolutionary Algorithm
     - Một quần thể duy nhất giải đồng thời TSP và Knapsack
@@ -23,139 +251,19 @@ def mfea_tsp_knapsack(dist_matrix, values, weights, capacity,
     - Evaluate FITNESS for child
     - Union population (parent +child)
     - Ckeck end-condition
-    """
 
-    # Init population
-    """
-    Chỉ có 1 quần thể chung: mỗi cá thể là 1 vector X = [x₁, x₂, ..., x_D]
-    TSP và Knapsack có D khác nhau
-    → ta cần đệm (padding) hoặc cắt (truncate) sao cho cùng chiều D_common.
+    evaluator: "serial" / "thread" / "process" — backend đánh giá tour TSP (utils.evaluator)
+    rmp: số cố định hoặc "adaptive" (ma trận RMP học online, xem mfea)
+    seed: None / int / numpy.random.Generator, truyền thẳng cho mfea
+    observer: utils.observer.Observer (xem mfea)
+    Trường hợp 2 task của mfea(): [TSPTask, KnapsackTask], 50 cặp cha mẹ mỗi thế hệ.
     """
-    n_tsp  = dist_matrix.shape[0]
-    n_knap = len(values)
-    D = max(n_tsp, n_knap)
-    population   = np.random.rand(pop_size, D)
-    
-    # Set up SKILL FACTOR  # 0 = TSP, 1 = Knapsack
-    skill_factor = np.random.choice([0, 1], pop_size) 
-
-    # Calc fitness for each task
-    fitnesses = np.zeros(pop_size)
-    for i, ind in enumerate(population):
-        if skill_factor[i] == 0:
-            fitnesses[i] = fitness_tsp(ind[:n_tsp], dist_matrix)
-        else:
-            fitnesses[i] = fitness_knapsack(ind[:n_knap], values, weights, capacity)
-
-    # Vòng lặp tiến hóa
-    best_tsp_fit   = np.max(fitnesses[skill_factor == 0]) if np.any(skill_factor == 0) else -np.inf
-    best_knap_fit  = np.max(fitnesses[skill_factor == 1]) if np.any(skill_factor == 1) else -np.inf
-    no_improve = 0
-    gen = 0
-    hist_tsp, hist_knap = [], []
-    
-    while no_improve < patience and gen < max_gens:
-        gen += 1
-        offspring, offspring_skill = [], []
-        
-        for _ in range(50):
-            k = 5
-            # chọn cha mẹ qua tournament
-            (p1, sf1), (p2, sf2) = random_parents_mfea(population, skill_factor)
-            # print(f"parent1:{fitness(p1,sf1,dist_matrix,values, weights, capacity)},{sf1}   parent2:{fitness(p2,sf2,dist_matrix,values, weights, capacity)},{sf2}")
-
-            # lai ghép (cross-task nếu random < rmp)
-            if sf1 != sf2 and random.random() > rmp:
-                continue
-            c1, c2 = sbx_crossover(p1, p2)
-
-            # đột biến
-            c1, c2 = polynomial_mutation(c1), polynomial_mutation(c2)
-
-            offspring.append(c1)
-            offspring.append(c2)
-            offspring_skill.extend([
-                random.choice([sf1, sf2]),
-                random.choice([sf1, sf2])
-            ])
-            
-
-        if len(offspring) == 0:
-            # không sinh được con (rmp quá nhỏ) → bỏ qua thế hệ
-            no_improve += 1
-            continue
-
-        offspring = np.array(offspring)
-        # Set up SKILL FACTOR for child
-        offspring_skill = np.array(offspring_skill)
-
-        # Evaluate FITNESS for child
-        offspring_fitness = np.zeros(len(offspring))
-        for i, ind in enumerate(offspring):
-            if offspring_skill[i] == 0:
-                offspring_fitness[i] = fitness_tsp(ind[:n_tsp], dist_matrix)
-            else:
-                offspring_fitness[i] = fitness_knapsack(ind[:n_knap], values, weights, capacity)
-
-        # Union (cha + con)
-        population = np.vstack([population, offspring])
-        fitnesses = np.hstack([fitnesses, offspring_fitness])
-        skill_factor = np.hstack([skill_factor, offspring_skill])
-
-        # Elitism per task
-        new_pop, new_fit, new_sf = [], [], []
-        half = pop_size // 2
-        for sf in np.unique(skill_factor):
-            mask = np.where(skill_factor == sf)[0]
-            take = min(half, len(mask))
-            top = mask[np.argsort(fitnesses[mask])[::-1][:take]]
-            new_pop.extend(population[top])
-            new_fit.extend(fitnesses[top])
-            new_sf.extend(skill_factor[top])
-
-        if len(new_pop) < pop_size:
-            remain = pop_size - len(new_pop)
-            rest_idx = np.argsort(fitnesses)[::-1][:remain]
-            new_pop.extend(population[rest_idx])
-            new_fit.extend(fitnesses[rest_idx])
-            new_sf.extend(skill_factor[rest_idx])
-
-        population = np.array(new_pop)
-        fitnesses = np.array(new_fit)
-        skill_factor = np.array(new_sf)
-
-        # Kiểm tra cải thiện
-        cur_best_tsp = np.max(fitnesses[skill_factor == 0]) if np.any(skill_factor == 0) else -np.inf
-        cur_best_knap = np.max(fitnesses[skill_factor == 1]) if np.any(skill_factor == 1) else -np.inf
-        hist_tsp.append(1/cur_best_tsp if cur_best_tsp != -np.inf else 0.0)
-        hist_knap.append(-cur_best_knap if cur_best_knap != -np.inf else 0.0)
-
-        improved = False
-        if cur_best_tsp > best_tsp_fit:
-            best_tsp_fit = cur_best_tsp
-            improved = True
-        if cur_best_knap > best_knap_fit:
-            best_knap_fit = cur_best_knap
-            improved = True
-
-        no_improve = 0 if improved else no_improve + 1
-        
-        if gen % 10 == 0:
-            print(f"[Gen {gen:04d}]  TSP={best_tsp_fit:.6f}  |  Knapsack={best_knap_fit:.6f}  |  no_improve={no_improve}")
-
-    # Extract best individuals
-    best_tsp_ind = population[np.argmax([
-        fitness_tsp(ind[:n_tsp], dist_matrix) if sf == 0 else -np.inf
-        for ind, sf in zip(population, skill_factor)
-    ])] if np.any(skill_factor == 0) else None
-
-    best_knap_ind = population[np.argmax([
-        fitness_knapsack(ind[:n_knap], values, weights, capacity) if sf == 1 else -np.inf
-        for ind, sf in zip(population, skill_factor)
-    ])] if np.any(skill_factor == 1) else None
-
-    print(f"\n Dừng sau {gen} thế hệ (no_improve={no_improve})")
-    print(f"   Best TSP: {1/best_tsp_fit:.6f}")
-    print(f"   Best Knapsack : {best_knap_fit:.6f}")
-
-    return best_tsp_ind, best_knap_ind, hist_tsp, hist_knap
+    tasks = [TSPTask(dist_matrix, evaluator=evaluator, workers=workers, name="TSP"),
+             KnapsackTask(values, weights, capacity, name="Knapsack")]
+    best_ind, best_fit, (hist_tsp, hist_knap) = mfea(
+        tasks, pop_size=pop_size, rmp=rmp, patience=patience, max_gens=max_gens, pairs=50, seed=seed,
+        observer=observer
+    )
+    # lịch sử knapsack giữ quy ước cũ (-giá trị)
+    hist_knap = [-v for v in hist_knap]
+    return best_ind[0], best_ind[1], hist_tsp, hist_knap
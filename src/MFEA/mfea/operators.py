@@ -1,11 +1,27 @@
 import numpy as np
 import random
+import sys
+from pathlib import Path
+
+# Thư mục gốc project = 3 cấp trên (__file__/../../..)
+PROJECT_ROOT_STR = str(Path(__file__).resolve().parents[3])
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+
+# Bản batch (mảng (cặp, D) + numpy Generator) dùng trong vòng lặp MFEA
+from utils.real_operators import sbx_crossover_batch, polynomial_mutation_batch, gaussian_mutation_batch
 
 # Tournament
 def random_parents_mfea(population, skill_factor):
     i, j = np.random.choice(len(population), 2, replace=False)
     return (population[i], skill_factor[i]), (population[j], skill_factor[j])
 
+def random_parents_mfea_batch(pop_len, num, rng):
+    """Chọn `num` cặp chỉ số cha mẹ khác nhau (i != j) một lần."""
+    i = rng.integers(0, pop_len, size=num)
+    j = rng.integers(0, pop_len - 1, size=num)
+    return i, j + (j >= i)
+
 # Simulated Binary Crossover (SBX)
 def sbx_crossover(p1, p2, eta_c=2):
     """
@@ -1,4 +1,15 @@
 import numpy as np
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+# Thư mục gốc project = 3 cấp trên (__file__/../../..)
+PROJECT_ROOT_STR = str(Path(__file__).resolve().parents[3])
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+
+from utils.tsp_eval import tour_length, tour_lengths
+from utils.evaluator import open_evaluator
 
 """
 - TSP:
@@ -21,10 +32,7 @@ Với mỗi task, ta giải mã (decode) vector đó theo cách riêng:
 
 # TASK 1: Traveling Salesman Problem
 def tsp_distance(path, dist_matrix):
-    total = 0.0
-    for i in range(len(path)):
-        total += dist_matrix[path[i]][path[(i + 1) % len(path)]]
-    return total
+    return tour_length(path, dist_matrix)
 
 def decode_tsp(gen, dist_matrix):
     """
@@ -39,11 +47,74 @@ def fitness_tsp(gen, dist_matrix):
     path = decode_tsp(gen,dist_matrix)
     return 1.0 / (tsp_distance(path, dist_matrix) + 1e-9)
 
+def fitness_tsp_batch(genes, dist_matrix, evaluator=None):
+    """
+    Fitness TSP cho cả ma trận gen (m, D): argsort theo hàng + đánh giá batch.
+    evaluator: backend utils.evaluator (None = tour_lengths tuần tự).
+    """
+    n_tsp = dist_matrix.shape[0]
+    paths = np.argsort(np.asarray(genes)[:, :n_tsp], axis=1)
+    lengths = evaluator.tour_lengths(paths) if evaluator is not None else tour_lengths(paths, dist_matrix)
+    return 1.0 / (lengths + 1e-9)
+
 
 # TASK 2: 0/1 Knapsack Problem
-import numpy as np
+def knapsack_ratio_order(values, weights):
+    """Thứ tự vật theo value/weight giảm dần (hòa -> chỉ số nhỏ trước); tính một lần cho mỗi instance."""
+    values  = np.asarray(values, float)
+    weights = np.asarray(weights, float)
+    ratio = values / np.maximum(weights, 1e-12)
+    return np.argsort(-ratio, kind="stable")
+
+def decode_knapsack_batch(genes, values, weights, capacity, ratio_order=None):
+    """
+    Giải mã greedy-fill cho cả ma trận gen (m, D) cùng lúc:
+    1. Thứ tự mỗi hàng: gen ↓ (chính), ratio ↓ (tie-break) = sort ổn định theo -gen
+       trên các cột đã xếp sẵn theo ratio_order (giống np.lexsort((-ratio, -gen)))
+    2. Tiền tố: các vật đầu hàng có tổng trọng lượng tích lũy < capacity chắc chắn được chọn (cumsum)
+    3. Hiệu chỉnh: từ vị trí đầu tiên không còn chắc chắn, duyệt theo cột cho mọi hàng còn hoạt động
+       (chọn nếu w <= rem; hàng dừng khi rem <= 0 — giống vòng for/break của bản từng cá thể)
+    Trả về: (bits (m, n) int, tổng giá trị (m,)).
+    """
+    values  = np.asarray(values, float)
+    weights = np.asarray(weights, float)
+    n = len(values)
+    genes = np.atleast_2d(np.asarray(genes, float))[:, :n]
+    m = len(genes)
+    if ratio_order is None:
+        ratio_order = knapsack_ratio_order(values, weights)
+
+    order = ratio_order[np.argsort(-genes[:, ratio_order], axis=1, kind="stable")]
+    w = weights[order]
+    cum = np.cumsum(w, axis=1)
+    k = np.logical_and.accumulate(cum < capacity, axis=1).sum(axis=1)   # độ dài tiền tố chắc chắn
+
+    rows = np.arange(m)
+    take = np.arange(n)[None, :] < k[:, None]
+    rem = capacity - np.where(k > 0, cum[rows, np.maximum(k - 1, 0)], 0.0)
+    active = k < n
+    for j in range(int(k.min()) if m else n, n):
+        live = active & (k <= j)
+        if not live.any():
+            if not active.any():
+                break
+            continue
+        fit = live & (w[:, j] <= rem)
+        take[:, j] |= fit
+        rem = np.where(fit, rem - w[:, j], rem)
+        active &= ~(live & (rem <= 0))
+
+    bits = np.zeros((m, n), dtype=int)
+    np.put_along_axis(bits, order, take.astype(int), axis=1)
+    total_w = bits @ weights
+    total_v = np.where(total_w > capacity, 0.0, bits @ values)
+    return bits, total_v
 
 def decode_knapsack_fill(gen, values, weights, capacity):
+    """
+    Bản một cá thể của decode_knapsack_batch (cùng kết quả): vòng for dừng ngay khi rem <= 0,
+    nhanh hơn nhiều so với dựng ma trận (1, n) cho một hàng.
+    """
     gen     = np.asarray(gen, float)[:len(values)]
     values  = np.asarray(values, float)
     weights = np.asarray(weights, float)
@@ -66,9 +137,9 @@ def decode_knapsack_fill(gen, values, weights, capacity):
 
 def knapsack_cost(gen, values, weights, capacity):
     bits = decode_knapsack_fill(gen, values, weights, capacity)
-    total_w = np.sum(weights * bits)
-    total_v = np.sum(values * bits)
-    
+    total_w = np.sum(np.asarray(weights, float) * bits)
+    total_v = np.sum(np.asarray(values, float) * bits)
+
     if total_w > capacity:
         return 0.0
     return float(total_v)
@@ -76,8 +147,96 @@ def knapsack_cost(gen, values, weights, capacity):
 def fitness_knapsack(gen, values, weights, capacity):
     return knapsack_cost(gen, values, weights, capacity)
 
+def fitness_knapsack_batch(genes, values, weights, capacity, ratio_order=None):
+    """Fitness Knapsack (tổng giá trị) cho cả ma trận gen (m, D)."""
+    return decode_knapsack_batch(genes, values, weights, capacity, ratio_order)[1]
+
 def fitness(gen, sf,dist_matrix,values, weights, capacity):
     if sf == 0:
         return fitness_tsp(gen, dist_matrix)
     else:
-        return fitness_knapsack(gen, values, weights, capacity)
\ No newline at end of file
+        return fitness_knapsack(gen, values, weights, capacity)
+
+
+# ---------- Task registry (MFEA nhiều task) ----------
+"""
+Mỗi task cho MFEA cung cấp:
+- dim: số gene dùng (phần đầu của vector chung [0,1]^D)
+- fitness_batch(genes): fitness (lớn hơn = tốt hơn) cho ma trận gen (m, D)
+- decode(gen): lời giải của task từ một vector gen
+- report(fit): giá trị để in / ghi lịch sử (TSP: độ dài tour, Knapsack: tổng giá trị)
+- running(): context mở tài nguyên khi chạy (vd. evaluator process của TSP)
+Đăng ký kiểu task mới: TASK_TYPES["tên"] = Lớp; tạo bằng make_task("tên", ...).
+"""
+
+class Task:
+    name = "task"
+    dim = 0
+
+    def fitness_batch(self, genes):
+        raise NotImplementedError
+
+    def decode(self, gen):
+        return np.asarray(gen)[:self.dim]
+
+    def report(self, fit):
+        return fit
+
+    @contextmanager
+    def running(self):
+        yield self
+
+
+class TSPTask(Task):
+    """TSP: gen -> argsort(gen[:n]) -> tour; fitness = 1 / độ dài."""
+    def __init__(self, dist_matrix, evaluator="serial", workers=None, name="tsp"):
+        self.dist_matrix = dist_matrix
+        self.dim = dist_matrix.shape[0]
+        self.evaluator = evaluator
+        self.workers = workers
+        self.name = name
+        self._ev = None
+
+    def fitness_batch(self, genes):
+        return fitness_tsp_batch(genes, self.dist_matrix, self._ev)
+
+    def decode(self, gen):
+        return decode_tsp(gen, self.dist_matrix)
+
+    def report(self, fit):
+        return 1.0 / fit
+
+    @contextmanager
+    def running(self):
+        with open_evaluator(self.dist_matrix, self.evaluator, self.workers) as ev:
+            self._ev = ev
+            try:
+                yield self
+            finally:
+                self._ev = None
+
+
+class KnapsackTask(Task):
+    """0/1 Knapsack: greedy-fill theo gen (decode_knapsack_batch); fitness = tổng giá trị."""
+    def __init__(self, values, weights, capacity, name="knapsack"):
+        self.values = np.asarray(values, float)
+        self.weights = np.asarray(weights, float)
+        self.capacity = float(capacity)
+        self.dim = len(self.values)
+        self.name = name
+        self.ratio_order = knapsack_ratio_order(self.values, self.weights)
+
+    def fitness_batch(self, genes):
+        return fitness_knapsack_batch(genes, self.values, self.weights, self.capacity, self.ratio_order)
+
+    def decode(self, gen):
+        return decode_knapsack_batch(gen, self.values, self.weights, self.capacity, self.ratio_order)[0][0]
+
+
+TASK_TYPES = {"tsp": TSPTask, "knapsack": KnapsackTask}
+
+def make_task(kind, *args, **kwargs):
+    """make_task("tsp", dist_matrix) / make_task("knapsack", values, weights, capacity)."""
+    if kind not in TASK_TYPES:
+        raise ValueError(f"Unknown task type: {kind!r}")
+    return TASK_TYPES[kind](*args, **kwargs)
@@ -1,17 +1,27 @@
 import random
-from tsp_utils import tour_length, nearest_neighbor_seed, two_opt_local_search
+import numpy as np
+from tsp_utils import tour_length, tour_lengths, nearest_neighbor_seed, two_opt_local_search
+from utils.tsp_eval import swap_delta
+from utils.local_search import neighbor_lists, or_3opt
+from utils.evaluator import open_evaluator
+from utils.rng import as_generator, py_random
+from utils.observer import Tracker, edge_diversity
+from utils.perm_operators import crossover_ERX
 
 def fitness_perm(ind, dist):
     return 1.0 / (tour_length(ind, dist) + 1e-9)
 
-def tournament_select(pop, dist, k=5):
-    cand = random.sample(pop, k)
-    cand.sort(key=lambda t: fitness_perm(t, dist), reverse=True)
-    return cand[0]
+def tournament_select(pop, dist, k=5, costs=None, rng=random):
+    if costs is None:
+        cand = rng.sample(pop, k)
+        cand.sort(key=lambda t: fitness_perm(t, dist), reverse=True)
+        return cand[0]
+    idx = rng.sample(range(len(pop)), k)
+    return pop[min(idx, key=lambda i: costs[i])]
 
-def crossover_OX(p1, p2):
+def crossover_OX(p1, p2, rng=random):
     n = len(p1)
-    a, b = sorted(random.sample(range(n), 2))
+    a, b = sorted(rng.sample(range(n), 2))
     child = [None] * n
     child[a:b] = p1[a:b]
     pos = b
@@ -21,51 +31,99 @@ def crossover_OX(p1, p2):
             child[pos] = x; pos += 1
     return child
 
-def mutate_swap(ind, rate=0.2):
-    if random.random() < rate:
-        a, b = random.sample(range(len(ind)), 2)
+def mutate_swap(ind, rate=0.2, dist=None, rng=random):
+    """dist != None -> trả về (ind, delta): thay đổi độ dài tour do phép swap (0 nếu không đột biến)."""
+    delta = 0.0
+    if rng.random() < rate:
+        a, b = rng.sample(range(len(ind)), 2)
+        if dist is not None:
+            delta = swap_delta(ind, dist, a, b)
         ind[a], ind[b] = ind[b], ind[a]
-    return ind
+    return ind if dist is None else (ind, delta)
 
 def GA_tsp(dist, init_pop, pop_size=80, gens=600, cx_rate=0.9,
-           mut_rate=0.2, use_2opt_every=30, two_opt_swaps=80):
+           mut_rate=0.2, use_2opt_every=30, two_opt_swaps=80, local_search="2opt",
+           evaluator="serial", workers=None, crossover="ox", seed=None, observer=None):
+    """
+    GA hoán vị cho TSP, local search định kỳ mỗi `use_2opt_every` thế hệ:
+    - local_search="2opt": 2-opt giới hạn `two_opt_swaps` nước đi
+    - local_search="or3opt": bước memetic Or-3opt (2-opt + Or-opt) tới cực tiểu địa phương
+    - evaluator: "serial" / "thread" / "process" (utils.evaluator), workers: số worker
+    - crossover: "ox" hoặc "erx" (Edge Recombination, giữ cạnh của cha mẹ — xem utils.perm_operators.crossover_ERX)
+    - seed: None / int / numpy.random.Generator (utils.rng) — cùng seed cho cùng kết quả
+    - observer: utils.observer.Observer nhận event mỗi thế hệ (thời gian từng pha, số đánh giá, ...)
+    """
+    tracker = Tracker(observer, "GA_tsp", pop_size=pop_size, n=dist.shape[0], crossover=crossover,
+                      local_search=local_search)
+    clock = tracker.clock
+    rng = py_random(as_generator(seed))
+    cross = crossover_ERX if crossover == "erx" else crossover_OX
     # khởi tạo
     pop = [t[:] for t in init_pop[:pop_size]]
     n = dist.shape[0]
     while len(pop) < pop_size:
-        start = random.randrange(n)
+        start = rng.randrange(n)
         pop.append(nearest_neighbor_seed(n, dist, start))
 
-    best = min(pop, key=lambda t: tour_length(t, dist))
-    best_cost = tour_length(best, dist)
-    history = [best_cost]
+    with open_evaluator(dist, evaluator, workers) as ev:
+        costs = ev.tour_lengths(pop)
+        nbrs = neighbor_lists(dist) if use_2opt_every else None
+        best = pop[int(np.argmin(costs))][:]
+        best_cost = float(costs.min())
+        history = [best_cost]
+        tracker.generation(0, costs, len(pop), lambda: edge_diversity(pop, best))
 
-    for g in range(1, gens + 1):
-        new_pop = []
-        for _ in range(pop_size):
-            p1 = tournament_select(pop, dist)
-            p2 = tournament_select(pop, dist)
-            if random.random() < cx_rate:
-                c = crossover_OX(p1, p2)
-            else:
-                c = p1[:]
-            if random.random() < mut_rate:
-                c = mutate_swap(c, rate=1.0)
-            new_pop.append(c)
+        for g in range(1, gens + 1):
+            # con copy từ p1 mang theo chi phí cha (+ delta swap), con lai ghép để NaN -> đánh giá sau
+            cost_of = {id(t): c for t, c in zip(pop, costs)}
+            new_pop = []
+            new_costs = np.full(pop_size, np.nan)
+            for k in range(pop_size):
+                p1 = tournament_select(pop, dist, costs=costs, rng=rng)
+                p2 = tournament_select(pop, dist, costs=costs, rng=rng)
+                clock.lap("selection")
+                if rng.random() < cx_rate:
+                    c = cross(p1, p2, rng)
+                else:
+                    c = p1[:]
+                    new_costs[k] = cost_of[id(p1)]
+                clock.lap("crossover")
+                if rng.random() < mut_rate:
+                    if np.isnan(new_costs[k]):
+                        c = mutate_swap(c, rate=1.0, rng=rng)
+                    else:
+                        c, delta = mutate_swap(c, rate=1.0, dist=dist, rng=rng)
+                        new_costs[k] += delta
+                new_pop.append(c)
+                clock.lap("mutation")
 
-        pop = pop + new_pop
+            pop = pop + new_pop
+            all_costs = np.concatenate([costs, new_costs])
 
-        if use_2opt_every and g % use_2opt_every == 0:
-            for i in range(len(pop)):
-                pop[i] = two_opt_local_search(pop[i], dist, max_swaps=two_opt_swaps)
+            if use_2opt_every and g % use_2opt_every == 0:
+                for i in range(len(pop)):
+                    if local_search == "or3opt":
+                        pop[i] = or_3opt(pop[i], dist, neighbors=nbrs)
+                    else:
+                        pop[i] = two_opt_local_search(pop[i], dist, max_swaps=two_opt_swaps, neighbors=nbrs)
+                all_costs[:] = np.nan   # local search đổi tour -> đánh giá lại cả quần thể
+                clock.lap("local_search")
 
-        pop.sort(key=lambda t: tour_length(t, dist))
-        pop = pop[:pop_size]
+            unknown = np.flatnonzero(np.isnan(all_costs))
+            if len(unknown):
+                all_costs[unknown] = ev.tour_lengths([pop[i] for i in unknown])
+            clock.lap("evaluation")
+            order = np.argsort(all_costs, kind="stable")[:pop_size]
+            pop = [pop[i] for i in order]
+            costs = all_costs[order]
+            clock.lap("elitism")
 
-        cur = tour_length(pop[0], dist)
-        if cur < best_cost:
-            best = pop[0][:]
-            best_cost = cur
-        history.append(best_cost)
+            cur = float(costs[0])
+            if cur < best_cost:
+                best = pop[0][:]
+                best_cost = cur
+            history.append(best_cost)
+            tracker.generation(g, costs, len(unknown), lambda: edge_diversity(pop, pop[0]))
 
-    return best, best_cost, history
+        tracker.end(best_cost=best_cost, generations=gens)
+        return best, best_cost, history
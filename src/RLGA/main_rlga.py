@@ -1,7 +1,7 @@
 from pathlib import Path
 import sys
 from tsp_utils import load_tsplib_tsp, tour_length, nearest_neighbor_seed, two_opt_local_search
-from rl_edge_dql import EdgeDoubleQL
+from rl_edge_dql import EdgeDoubleQL, checkpoint_dir
 from ga_tsp import GA_tsp
 
 # Thư mục gốc project = 2 cấp trên (__file__/../..)
@@ -13,15 +13,29 @@ if PROJECT_ROOT_STR not in sys.path:
     
 from utils.plot import plot_scores, plot_tour
 
-def main():
+def main(warm_episodes=0):
+    """warm_episodes > 0: đã có checkpoint Q thì học thêm ngần ấy episode rồi lưu lại."""
     # 1) Load TSP
     dist, coords = load_tsplib_tsp("data/TSP/eil51.tsp")
     n = dist.shape[0]
     print(f"TSP n={n}")
 
-    # 2) RL: học bảng Q theo cạnh
-    rl = EdgeDoubleQL(n, alpha=0.01, gamma=0.15, eps_schedule=("linear",), seed=0)
-    rl.train(dist, episodes=4000, reward="inv", start_mode="all")
+    # 2) RL: học bảng Q theo cạnh — đã có checkpoint cho instance này thì nạp lại
+    #    (warm_episodes > 0: học thêm từ checkpoint thay vì bỏ qua hẳn bước train)
+    #    Checkpoint được khóa theo cả cấu hình dưới đây -> đổi siêu tham số thì train lại.
+    hparams = dict(alpha=0.01, gamma=0.15, eps_schedule=("linear",))
+    train_cfg = dict(episodes=4000, reward="inv", start_mode="all")
+    ckpt = checkpoint_dir(dist, **hparams, **train_cfg)
+    if (ckpt / "meta.json").exists():
+        rl = EdgeDoubleQL.load(ckpt, dist=dist)
+        print(f"Loaded Q-table checkpoint {ckpt} ({rl.episodes_trained} episodes)")
+        if warm_episodes:
+            rl.train(dist, episodes=warm_episodes, reward=train_cfg["reward"], start_mode=train_cfg["start_mode"])
+            rl.save(ckpt, dist=dist)
+    else:
+        rl = EdgeDoubleQL(n, **hparams, seed=0)
+        rl.train(dist, **train_cfg)
+        rl.save(ckpt, dist=dist)
 
     # 3) Tạo seed từ RL + một ít NN
     rl_seeds = rl.make_seeds(dist, k=40, diversify=True, do_2opt=True, two_opt_fn=two_opt_local_search)
@@ -37,7 +51,8 @@ def main():
         cx_rate=0.95,
         mut_rate=0.25,
         use_2opt_every=40,
-        two_opt_swaps=80
+        two_opt_swaps=80,
+        seed=0
     )
 
     print("\nBest tour length:", best_cost)
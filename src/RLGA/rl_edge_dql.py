@@ -1,20 +1,70 @@
+import os
+import json
 import random
+import shutil
+import hashlib
 import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from tsp_utils import two_opt_local_search
+from utils.local_search import neighbor_lists
+from utils.rng import py_random
+
+CHECKPOINT_DIR = Path(__file__).resolve().parents[2] / ".cache" / "edgeql"
+
+def instance_hash(dist):
+    """Khóa của instance: hash tọa độ + kiểu khoảng cách (DistanceOracle) hoặc nội dung ma trận."""
+    h = hashlib.sha1()
+    if hasattr(dist, "coords"):
+        h.update(dist.weight_type.encode())
+        h.update(np.ascontiguousarray(dist.coords, dtype=float).tobytes())
+    else:
+        h.update(np.ascontiguousarray(dist, dtype=float).tobytes())
+    return h.hexdigest()[:16]
+
+def checkpoint_dir(dist, root=None, knn=None, **config):
+    """
+    Thư mục checkpoint mặc định cho instance `dist` (và kiểu bảng dày / knn).
+    config: cấu hình huấn luyện (alpha, gamma, eps_schedule, episodes, reward, ...) -> hash ngắn
+    trong tên thư mục: đổi cấu hình thì ra checkpoint khác, không nạp nhầm bảng Q cũ.
+    """
+    root = Path(root) if root is not None else CHECKPOINT_DIR
+    name = f"{instance_hash(dist)}" + (f"-knn{knn}" if knn else "")
+    if config:
+        key = json.dumps({k: list(v) if isinstance(v, tuple) else v for k, v in config.items()}, sort_keys=True)
+        name += "-" + hashlib.sha1(key.encode()).hexdigest()[:8]
+    return root / name
 
 class EdgeDoubleQL:
     """
     Double Q-learning theo cạnh:
     Học QA[i,j], QB[i,j] ~ độ hấp dẫn khi đi i -> j.
     Dùng trung bình (QA+QB)/2 để chọn greedy.
+
+    knn=k: bảng Q thưa (n, k) chỉ trên k láng giềng gần nhất của mỗi đỉnh
+    (QA[i, s] ứng với cạnh i -> nbr[i, s]); bộ nhớ O(nk) thay vì O(n²).
+    Khi mọi láng giềng đã thăm thì đi tới đỉnh chưa thăm gần nhất (không cập nhật Q).
+
+    seed: int / None, hoặc một numpy.random.Generator (utils.rng) — khi đó np_rng chính là
+    Generator đó và rng (random.Random cho train tuần tự) được gieo từ nó.
     """
-    def __init__(self, n, alpha=0.01, gamma=0.15, eps_schedule=("linear",), seed=0):
+    def __init__(self, n, alpha=0.01, gamma=0.15, eps_schedule=("linear",), seed=0, knn=None):
         self.n = n
         self.alpha = alpha
         self.gamma = gamma
-        self.rng = random.Random(seed)
-        self.QA = np.zeros((n, n), dtype=float)
-        self.QB = np.zeros((n, n), dtype=float)
+        if isinstance(seed, np.random.Generator):
+            self.np_rng = seed
+            self.rng = py_random(seed)
+        else:
+            self.rng = random.Random(seed)
+            self.np_rng = np.random.default_rng(seed)   # cho train(batch > 1) và build_tours
+        self.knn = min(knn, n - 1) if knn else None
+        width = self.knn or n
+        self.QA = np.zeros((n, width), dtype=float)
+        self.QB = np.zeros((n, width), dtype=float)
+        self.nbr = None   # (n, knn) int32, dựng từ dist ở lần train / build đầu tiên
         self.eps_schedule = eps_schedule
+        self.episodes_trained = 0
 
     def _epsilon(self, t, T):
         kind = self.eps_schedule[0]
@@ -28,87 +78,253 @@ class EdgeDoubleQL:
 
     def greedy_next(self, i, unvisited):
         q = (self.QA[i] + self.QB[i]) * 0.5
+        if self.nbr is not None:
+            q = dict(zip(self.nbr[i].tolist(), q.tolist()))
+            return max(unvisited, key=lambda j: q.get(j, -np.inf))
         return max(unvisited, key=lambda j: q[j])
 
-    def train(self, dist, episodes=4000, reward="inv", start_mode="all"):
+    # ----- bảng Q dày (cột = đỉnh) hoặc thưa (cột = vị trí trong nbr) -----
+    def _prepare(self, dist):
+        if self.knn and self.nbr is None:
+            self.nbr = neighbor_lists(dist, k=self.knn)
+
+    def _slots(self, cur, unvisited):
+        """Đỉnh ứng với từng cột Q của các hàng `cur` (None nếu bảng dày) và mask cột còn chọn được."""
+        if self.nbr is None:
+            return None, unvisited
+        cand = self.nbr[cur]
+        return cand, np.take_along_axis(unvisited, cand, axis=1)
+
+    def _nearest_unvisited(self, dist, cur, unvisited):
+        d = np.asarray(dist[cur], dtype=float).reshape(len(cur), self.n)
+        return np.argmin(np.where(unvisited, d, np.inf), axis=1)
+
+    def _reward(self, d, reward):
+        return (1.0 / (d + 1e-12)) if reward == "inv" else (-d)
+
+    def train(self, dist, episodes=4000, reward="inv", start_mode="all", batch=1):
         """
         reward: 'inv' -> r=1/d,  'neg' -> r=-d
         start_mode: 'random' hoặc 'all'
+        batch: số episode chạy song song (mask (batch, n)); batch=1 giữ đúng thứ tự cập nhật tuần tự
         """
+        self._prepare(dist)
+        self.episodes_trained += episodes
+        if batch > 1 or self.nbr is not None:
+            # bảng thưa luôn đi qua nhánh mảng (batch=1 vẫn đúng)
+            return self._train_batch(dist, episodes, reward, start_mode, batch)
         n = self.n
         T = episodes
         for ep in range(episodes):
             eps = self._epsilon(ep, T)
             s = ep % n if start_mode == "all" else self.rng.randrange(n)
 
-            visited = {s}
+            # mask chưa thăm cập nhật tại chỗ, chọn action bằng argmax có mask
+            unvisited = np.ones(n, dtype=bool)
+            unvisited[s] = False
             cur = s
 
-            while len(visited) < n:
+            for left in range(n - 1, 0, -1):
                 # chọn action
                 if self.rng.random() < eps:
-                    candidates = [j for j in range(n) if j not in visited]
-                    j = self.rng.choice(candidates)
+                    j = self.rng.choice(np.flatnonzero(unvisited).tolist())
                 else:
-                    j = self.greedy_next(cur, [x for x in range(n) if x not in visited])
+                    q = (self.QA[cur] + self.QB[cur]) * 0.5
+                    j = int(np.argmax(np.where(unvisited, q, -np.inf)))
 
-                d = dist[cur, j]
-                r = (1.0 / (d + 1e-12)) if reward == "inv" else (-d)
+                r = self._reward(dist[cur, j], reward)
+                unvisited[j] = False
 
-                # update QA hoặc QB
+                # update QA hoặc QB (lookahead từ bảng còn lại trên các đỉnh chưa thăm)
                 if self.rng.random() < 0.5:
-                    # update QA, lookahead từ QB
-                    if len(visited) + 1 < n:
-                        mask_next = [a for a in range(n) if a not in visited and a != j]
-                        max_next = np.max(self.QB[j, mask_next]) if mask_next else 0.0
-                    else:
-                        max_next = 0.0
-                    td = r + self.gamma * max_next - self.QA[cur, j]
-                    self.QA[cur, j] += self.alpha * td
+                    Q, Q_next = self.QA, self.QB
                 else:
-                    # update QB, lookahead từ QA
-                    if len(visited) + 1 < n:
-                        mask_next = [a for a in range(n) if a not in visited and a != j]
-                        max_next = np.max(self.QA[j, mask_next]) if mask_next else 0.0
-                    else:
-                        max_next = 0.0
-                    td = r + self.gamma * max_next - self.QB[cur, j]
-                    self.QB[cur, j] += self.alpha * td
-
-                visited.add(j)
+                    Q, Q_next = self.QB, self.QA
+                max_next = np.max(Q_next[j, unvisited]) if left > 1 else 0.0
+                td = r + self.gamma * max_next - Q[cur, j]
+                Q[cur, j] += self.alpha * td
+
                 cur = j
 
         return self
 
-    def build_tour(self, dist, start=0, random_tie=False):
+    def _train_batch(self, dist, episodes, reward, start_mode, batch):
+        """
+        Chạy `batch` episode cùng lúc trên mask (B, n):
+        mỗi bước chọn action, tính TD và cập nhật QA/QB cho cả B episode bằng phép toán mảng.
+        Cùng luật cập nhật với train tuần tự; các episode trong một lô đọc Q của cùng một bước
+        (cập nhật trùng cạnh được cộng dồn bằng np.add.at).
+        """
+        n = self.n
+        T = episodes
+        for ep0 in range(0, episodes, batch):
+            ep = np.arange(ep0, min(ep0 + batch, episodes))
+            B = len(ep)
+            rows = np.arange(B)
+            eps = np.array([self._epsilon(e, T) for e in ep])
+            cur = ep % n if start_mode == "all" else self.np_rng.integers(0, n, size=B)
+
+            unvisited = np.ones((B, n), dtype=bool)
+            unvisited[rows, cur] = False
+
+            for _ in range(n - 1):
+                # chọn action: ngẫu nhiên đều trên cột chọn được hoặc greedy theo (QA+QB)/2
+                cand, avail = self._slots(cur, unvisited)
+                keys = np.where(avail, self.np_rng.random(avail.shape), -1.0)
+                q = np.where(avail, (self.QA[cur] + self.QB[cur]) * 0.5, -np.inf)
+                explore = self.np_rng.random(B) < eps
+                slot = np.where(explore, np.argmax(keys, axis=1), np.argmax(q, axis=1))
+                j = slot if cand is None else cand[rows, slot]
+
+                # hết láng giềng chưa thăm -> đỉnh chưa thăm gần nhất, không cập nhật
+                learn = avail.any(axis=1)
+                if not learn.all():
+                    stuck = np.flatnonzero(~learn)
+                    j[stuck] = self._nearest_unvisited(dist, cur[stuck], unvisited[stuck])
+
+                r = self._reward(np.asarray(dist[cur, j], dtype=float), reward)
+                unvisited[rows, j] = False
+
+                # lookahead trên các cột còn chọn được của j (không còn -> 0)
+                upd_a = self.np_rng.random(B) < 0.5
+                _, avail_next = self._slots(j, unvisited)
+                next_b = np.where(avail_next, self.QB[j], -np.inf).max(axis=1)
+                next_a = np.where(avail_next, self.QA[j], -np.inf).max(axis=1)
+                max_next = np.where(upd_a, next_b, next_a)
+                max_next[~avail_next.any(axis=1)] = 0.0
+
+                sel_a, sel_b = learn & upd_a, learn & ~upd_a
+                a, b = cur[sel_a], slot[sel_a]
+                td_a = r[sel_a] + self.gamma * max_next[sel_a] - self.QA[a, b]
+                a2, b2 = cur[sel_b], slot[sel_b]
+                td_b = r[sel_b] + self.gamma * max_next[sel_b] - self.QB[a2, b2]
+                np.add.at(self.QA, (a, b), self.alpha * td_a)
+                np.add.at(self.QB, (a2, b2), self.alpha * td_b)
+
+                cur = j
+
+        return self
+
+    def build_tours(self, dist, starts, random_tie=False):
+        """
+        Dựng k tour cùng lúc từ mask đã thăm (k, n):
+        - Greedy: argmax (QA+QB)/2 trên các đỉnh chưa thăm
+        - random_tie: chọn ngẫu nhiên trong top 1/3 đỉnh chưa thăm theo q (argpartition,
+          số ứng viên giống nhau ở mọi hàng vì các tour có cùng độ dài tại mỗi bước)
+        - Bảng thưa: chỉ xét láng giềng chưa thăm (top 1/3 tính theo từng hàng),
+          hết láng giềng thì đi tới đỉnh chưa thăm gần nhất
+        Trả về mảng int (k, n).
+        """
+        self._prepare(dist)
         n = self.n
-        visited = {start}
-        cur = start
-        tour = [start]
-        while len(visited) < n:
-            unv = [j for j in range(n) if j not in visited]
-            q = (self.QA[cur] + self.QB[cur]) * 0.5
-            ranked = sorted(unv, key=lambda j: q[j], reverse=True)
-            j = ranked[0] if not random_tie else random.choice(ranked[:max(1, len(ranked)//3)])
-            tour.append(j)
-            visited.add(j)
+        cur = np.asarray(starts, dtype=np.int64)
+        k = len(cur)
+        rows = np.arange(k)
+        unvisited = np.ones((k, n), dtype=bool)
+        unvisited[rows, cur] = False
+        tours = np.empty((k, n), dtype=np.int64)
+        tours[:, 0] = cur
+        for step in range(1, n):
+            cand, avail = self._slots(cur, unvisited)
+            q = np.where(avail, (self.QA[cur] + self.QB[cur]) * 0.5, -np.inf)
+            if not random_tie:
+                slot = np.argmax(q, axis=1)
+            elif cand is None:
+                top = max(1, (n - step) // 3)
+                part = np.argpartition(-q, top - 1, axis=1)[:, :top]
+                slot = part[rows, self.np_rng.integers(0, top, size=k)]
+            else:
+                top = np.maximum(1, avail.sum(axis=1) // 3)
+                order = np.argsort(-q, axis=1, kind="stable")
+                slot = order[rows, (self.np_rng.random(k) * top).astype(np.int64)]
+            j = slot if cand is None else cand[rows, slot]
+            stuck = np.flatnonzero(~avail.any(axis=1))
+            if len(stuck):
+                j[stuck] = self._nearest_unvisited(dist, cur[stuck], unvisited[stuck])
+            unvisited[rows, j] = False
+            tours[:, step] = j
             cur = j
-        return tour
-
-    def make_seeds(self, dist, k=40, diversify=True, do_2opt=True, two_opt_fn=None):
-        seeds = []
-        # một phần từ các start khác nhau
-        for s in range(min(self.n, max(1, k//2))):
-            t = self.build_tour(dist, start=s, random_tie=diversify)
-            if do_2opt and two_opt_fn:
-                t = two_opt_fn(t, dist, max_swaps=150)
-            seeds.append(t)
-        # phần còn lại random start
-        import random as _r
-        while len(seeds) < k:
-            s = _r.randrange(self.n)
-            t = self.build_tour(dist, start=s, random_tie=diversify)
-            if do_2opt and two_opt_fn:
-                t = two_opt_fn(t, dist, max_swaps=150)
-            seeds.append(t)
-        return seeds
+        return tours
+
+    # ----- checkpoint -----
+    def save(self, path, dist=None):
+        """
+        Lưu vào thư mục `path`: QA.npy, QB.npy (nbr.npy nếu bảng thưa) + meta.json
+        (siêu tham số, số episode đã học, trạng thái RNG, hash instance nếu có dist).
+        Ghi vào thư mục tạm rồi đổi tên -> không để lại checkpoint dở dang.
+        """
+        path = Path(path)
+        tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "QA.npy", self.QA)
+        np.save(tmp / "QB.npy", self.QB)
+        if self.nbr is not None:
+            np.save(tmp / "nbr.npy", self.nbr)
+        meta = dict(
+            n=self.n, alpha=self.alpha, gamma=self.gamma, eps_schedule=list(self.eps_schedule),
+            knn=self.knn, episodes_trained=self.episodes_trained,
+            instance=instance_hash(dist) if dist is not None else None,
+            rng_state=self.rng.getstate(), np_rng_state=self.np_rng.bit_generator.state,
+        )
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path, dist=None, mmap=True):
+        """
+        Nạp checkpoint từ `path`. mmap=True: QA/QB ánh xạ copy-on-write (train tiếp chỉ sửa bản
+        trong bộ nhớ, file giữ nguyên). dist != None: kiểm tra hash instance khớp với lúc lưu.
+        """
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        if dist is not None and meta["instance"] not in (None, instance_hash(dist)):
+            raise ValueError(f"Checkpoint {path} was trained on a different instance")
+        self = cls(meta["n"], alpha=meta["alpha"], gamma=meta["gamma"],
+                   eps_schedule=tuple(meta["eps_schedule"]), knn=meta["knn"])
+        mode = "c" if mmap else None
+        self.QA = np.load(path / "QA.npy", mmap_mode=mode)
+        self.QB = np.load(path / "QB.npy", mmap_mode=mode)
+        if (path / "nbr.npy").exists():
+            self.nbr = np.load(path / "nbr.npy")
+        self.episodes_trained = meta["episodes_trained"]
+        version, state, gauss = meta["rng_state"]
+        self.rng.setstate((version, tuple(state), gauss))
+        self.np_rng.bit_generator.state = meta["np_rng_state"]
+        return self
+
+    def build_tour(self, dist, start=0, random_tie=False):
+        return self.build_tours(dist, [start], random_tie=random_tie)[0].tolist()
+
+    def make_seeds(self, dist, k=40, diversify=True, do_2opt=True, two_opt_fn=None, workers=None):
+        """
+        k seed từ bảng Q: nửa đầu bắt đầu từ các đỉnh 0, 1, ..., phần còn lại start ngẫu nhiên;
+        dựng cả lô bằng build_tours rồi 2-opt (workers > 1 -> chạy trên ProcessPoolExecutor).
+        """
+        # mặc định dùng 2-opt neighbor-list của tsp_utils
+        if two_opt_fn is None:
+            two_opt_fn = two_opt_local_search
+        first = min(self.n, max(1, k // 2))
+        starts = np.concatenate([np.arange(first),
+                                 self.np_rng.integers(0, self.n, size=max(0, k - first))])
+        seeds = self.build_tours(dist, starts, random_tie=diversify).tolist()
+        if not (do_2opt and two_opt_fn):
+            return seeds
+        if workers and workers > 1 and len(seeds) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_seed_worker,
+                                     initargs=(two_opt_fn, dist)) as pool:
+                return list(pool.map(_seed_two_opt, seeds, chunksize=max(1, len(seeds) // (4 * workers))))
+        return [two_opt_fn(t, dist, max_swaps=150) for t in seeds]
+
+
+# ----- tiến trình con cho make_seeds(workers > 1): dist + hàm 2-opt gửi một lần qua initializer -----
+_SEED_WORKER = {}
+
+def _init_seed_worker(two_opt_fn, dist):
+    _SEED_WORKER["fn"] = two_opt_fn
+    _SEED_WORKER["dist"] = dist
+
+def _seed_two_opt(tour):
+    return _SEED_WORKER["fn"](tour, _SEED_WORKER["dist"], max_swaps=150)
@@ -1,28 +1,27 @@
 import numpy as np
-import tsplib95
 import random
+import sys
+from pathlib import Path
 
-def load_tsplib_tsp(path):
-    problem = tsplib95.load(path)
-    nodes = list(problem.get_nodes())  # 1..n
-    n = len(nodes)
-    dist = np.zeros((n, n), dtype=float)
-    for i, a in enumerate(nodes):
-        for j, b in enumerate(nodes):
-            dist[i, j] = problem.get_weight(a, b)
-    # coords (n,2) nếu có
-    coords = None
-    if hasattr(problem, "node_coords") and problem.node_coords:
-        coords = np.array([problem.node_coords[i] for i in nodes], dtype=float)
-    return dist, coords
+# Thư mục gốc project = 2 cấp trên (__file__/../..)
+PROJECT_ROOT_STR = str(Path(__file__).resolve().parents[2])
+if PROJECT_ROOT_STR not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT_STR)
+
+from utils.tsp_eval import tour_lengths
+from utils.local_search import two_opt
+from utils.tsplib_io import load_tsp
+
+def load_tsplib_tsp(path, dense=True, cache_rows=0):
+    """
+    dense=True: ma trận (n, n) tính vector hoá từ tọa độ;
+    dense=False: DistanceOracle (khoảng cách theo yêu cầu, cache_rows hàng LRU).
+    """
+    # trả về (dist, coords) — coords (n,2) nếu có; lần sau đọc lại từ cache .npy (mmap)
+    return load_tsp(path, dense=dense, cache_rows=cache_rows)
 
 def tour_length(tour, dist):
-    n = len(tour)
-    s = 0.0
-    for i in range(n):
-        a, b = tour[i], tour[(i+1) % n]
-        s += dist[a, b]
-    return s
+    return float(tour_lengths(tour, dist)[0])
 
 def nearest_neighbor_seed(n, dist, start=0):
     unvis = set(range(n))
@@ -53,8 +52,6 @@ def _two_opt_once(tour, dist):
         return True
     return False
 
-def two_opt_local_search(tour, dist, max_swaps=200):
-    swaps = 0
-    while swaps < max_swaps and _two_opt_once(tour, dist):
-        swaps += 1
-    return tour
+def two_opt_local_search(tour, dist, max_swaps=200, neighbors=None):
+    """2-opt theo danh sách láng giềng + don't-look bits (xem utils.local_search.two_opt)."""
+    return two_opt(tour, dist, neighbors=neighbors, max_moves=max_swaps)
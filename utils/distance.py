@@ -0,0 +1,157 @@
+import math
+import numpy as np
+from collections import OrderedDict
+
+"""
+Khoảng cách TSPLIB tính theo yêu cầu (on-demand) từ mảng tọa độ:
+- tsplib_distance(): công thức + quy tắc làm tròn TSPLIB dạng vector
+  (EUC_2D: nint, CEIL_2D: ceil, ATT: pseudo-Euclid, GEO: khoảng cách địa lý, MAN_2D, MAX_2D)
+- DistanceOracle: thay thế ma trận dày (n, n) — bộ nhớ O(n) thay vì O(n²).
+  Hỗ trợ cùng kiểu truy cập mà GA / local search / evaluator dùng với ndarray:
+      d[i, j] (số), d[i] / d[lo:hi] / d[idx_array] (hàng), d[I, J] (fancy, broadcast),
+      d.shape, len(d)
+Ma trận dày (np.ndarray) vẫn là một backend hợp lệ ở mọi nơi nhận `dist`.
+"""
+
+GEO_RADIUS = 6378.388
+WEIGHT_TYPES = ("EUC_2D", "CEIL_2D", "ATT", "GEO", "MAN_2D", "MAX_2D")
+
+def _geo_radians(coords):
+    """Tọa độ GEO (DDD.MM) -> radian, như tsplib95.utils.RadianGeo."""
+    deg = np.trunc(coords)
+    return np.radians(deg + (coords - deg) * 5.0 / 3.0)
+
+def tsplib_distance(a, b, weight_type="EUC_2D"):
+    """
+    Khoảng cách TSPLIB giữa hai mảng tọa độ (..., 2) cùng broadcast được.
+    Với GEO, a và b phải là tọa độ đã đổi sang radian (_geo_radians).
+    """
+    if weight_type == "GEO":
+        q1 = np.cos(a[..., 1] - b[..., 1])
+        q2 = np.cos(a[..., 0] - b[..., 0])
+        q3 = np.cos(a[..., 0] + b[..., 0])
+        inner = np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)
+        return np.trunc(GEO_RADIUS * np.arccos(inner) + 1.0)
+    dx = a[..., 0] - b[..., 0]
+    dy = a[..., 1] - b[..., 1]
+    if weight_type == "MAN_2D":
+        return np.trunc(np.abs(dx) + np.abs(dy) + 0.5)
+    if weight_type == "MAX_2D":
+        return np.trunc(np.maximum(np.abs(dx), np.abs(dy)) + 0.5)
+    if weight_type == "ATT":
+        r = np.sqrt((dx * dx + dy * dy) / 10.0)
+        t = np.trunc(r + 0.5)
+        return np.where(t < r, t + 1.0, t)
+    d = np.sqrt(dx * dx + dy * dy)
+    if weight_type == "CEIL_2D":
+        return np.ceil(d)
+    if weight_type == "EUC_2D":
+        return np.trunc(d + 0.5)
+    raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE: {weight_type!r}")
+
+
+class DistanceOracle:
+    """
+    Oracle khoảng cách TSPLIB từ tọa độ (n, 2):
+    - weight_type: một trong WEIGHT_TYPES
+    - cache_rows: số hàng giữ trong LRU cache (0 = không cache); hữu ích khi
+      NN / GRASP / local search đọc lặp lại cùng một hàng.
+    """
+    def __init__(self, coords, weight_type="EUC_2D", cache_rows=0):
+        if weight_type not in WEIGHT_TYPES:
+            raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE: {weight_type!r}")
+        coords = np.asarray(coords, dtype=float)[:, :2]
+        self.coords = coords
+        self.weight_type = weight_type
+        self._pts = _geo_radians(coords) if weight_type == "GEO" else coords
+        self._xy = self._pts.tolist()   # truy cập vô hướng d[i, j] nhanh hơn qua list
+        self.n = len(coords)
+        self.shape = (self.n, self.n)
+        self.dtype = np.dtype(float)
+        self.cache_rows = cache_rows
+        self._rows = OrderedDict()
+
+    def __len__(self):
+        return self.n
+
+    def __getstate__(self):
+        # không pickle cache hàng (gửi sang process khác chỉ tốn O(n))
+        state = self.__dict__.copy()
+        state["_rows"] = OrderedDict()
+        return state
+
+    # ----- truy cập -----
+    def pair(self, i, j):
+        """Khoảng cách giữa các cặp chỉ số (broadcast như fancy indexing)."""
+        i, j = np.broadcast_arrays(np.asarray(i), np.asarray(j))
+        return tsplib_distance(self._pts[i], self._pts[j], self.weight_type)
+
+    def row(self, i):
+        """Hàng i (n,), qua LRU cache nếu bật."""
+        i = int(i)
+        if self.cache_rows:
+            r = self._rows.get(i)
+            if r is not None:
+                self._rows.move_to_end(i)
+                return r
+        r = tsplib_distance(self._pts[i][None, :], self._pts, self.weight_type)
+        if self.cache_rows:
+            self._rows[i] = r
+            if len(self._rows) > self.cache_rows:
+                self._rows.popitem(last=False)
+        return r
+
+    def rows(self, idx):
+        """Nhiều hàng (k, n) tính một lần bằng broadcast."""
+        idx = np.asarray(idx)
+        return tsplib_distance(self._pts[idx][:, None, :], self._pts[None, :, :], self.weight_type)
+
+    def _scalar(self, i, j):
+        a, b = self._xy[i], self._xy[j]
+        if self.weight_type == "EUC_2D":
+            return float(int(math.hypot(a[0] - b[0], a[1] - b[1]) + 0.5))
+        if self.weight_type == "CEIL_2D":
+            return float(math.ceil(math.hypot(a[0] - b[0], a[1] - b[1])))
+        return float(tsplib_distance(self._pts[i], self._pts[j], self.weight_type))
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            i, j = key
+            if isinstance(i, (int, np.integer)) and isinstance(j, (int, np.integer)):
+                return self._scalar(i, j)
+            if isinstance(i, (int, np.integer)) and isinstance(j, slice):
+                return self.row(i)[j]
+            return self.pair(i, j)
+        if isinstance(key, (int, np.integer)):
+            return self.row(key)
+        if isinstance(key, slice):
+            return self.rows(np.arange(self.n)[key])
+        return self.rows(key)
+
+    def to_dense(self, chunk=1024):
+        """Ma trận dày (n, n), tính theo khối hàng (không có n² lời gọi Python)."""
+        out = np.empty(self.shape, dtype=float)
+        for lo in range(0, self.n, chunk):
+            hi = min(self.n, lo + chunk)
+            out[lo:hi] = self.rows(np.arange(lo, hi))
+        return out
+
+
+def distance_from_problem(problem, dense=True, cache_rows=0):
+    """
+    Dựng khoảng cách từ một tsplib95 problem:
+    - Có NODE_COORD_SECTION với kiểu trong WEIGHT_TYPES -> DistanceOracle
+      (dense=True trả về oracle.to_dense()).
+    - Ngược lại (EXPLICIT...) -> ma trận dày qua get_weight.
+    Trả về: (dist, coords) — coords (n, 2) hoặc None.
+    """
+    nodes = list(problem.get_nodes())
+    coords = None
+    if getattr(problem, "node_coords", None):
+        coords = np.array([problem.node_coords[i] for i in nodes], dtype=float)
+    weight_type = getattr(problem, "edge_weight_type", None)
+    if coords is not None and weight_type in WEIGHT_TYPES:
+        oracle = DistanceOracle(coords, weight_type, cache_rows=cache_rows)
+        return (oracle.to_dense() if dense else oracle), coords
+    dist = np.array([[problem.get_weight(i, j) for j in nodes] for i in nodes], dtype=float)
+    return dist, coords
@@ -0,0 +1,137 @@
+import os
+from contextlib import contextmanager
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from utils.tsp_eval import tour_lengths
+
+"""
+Backend đánh giá độ dài tour cho các engine (GA, GA_tsp, mfea_tsp_knapsack):
+- "serial" : một lần gọi tour_lengths trong tiến trình hiện tại
+- "thread" : chia lô tour cho ThreadPoolExecutor (dùng chung ma trận)
+- "process": chia lô tour cho ProcessPoolExecutor; ma trận khoảng cách được đặt MỘT lần
+             vào multiprocessing.shared_memory, mỗi task chỉ gửi phần quần thể cần đánh giá.
+Mọi backend có cùng giao diện: tour_lengths(pop) -> mảng (m,), close(), dùng được với `with`.
+"""
+
+class SerialEvaluator:
+    """Đánh giá tuần tự (mặc định)."""
+    def __init__(self, dist):
+        self.dist = dist
+
+    def tour_lengths(self, pop):
+        return tour_lengths(pop, self.dist)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _split(pop, parts):
+    pop = np.asarray(pop, dtype=np.int32)
+    if pop.ndim == 1:
+        pop = pop[None, :]
+    parts = max(1, min(parts, len(pop)))
+    return np.array_split(pop, parts)
+
+
+class ThreadEvaluator(SerialEvaluator):
+    """Chia quần thể thành `workers` khối, đánh giá song song bằng thread."""
+    def __init__(self, dist, workers=None):
+        super().__init__(dist)
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def tour_lengths(self, pop):
+        chunks = _split(pop, self.workers)
+        return np.concatenate(list(self._pool.map(lambda c: tour_lengths(c, self.dist), chunks)))
+
+    def close(self):
+        self._pool.shutdown()
+
+
+# ----- tiến trình con: ma trận gắn từ shared memory một lần khi khởi tạo -----
+_WORKER = {}
+
+def _attach_shared(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    _WORKER["shm"] = shm
+    _WORKER["dist"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _attach_oracle(oracle):
+    _WORKER["dist"] = oracle
+
+def _chunk_lengths(chunk):
+    return tour_lengths(chunk, _WORKER["dist"])
+
+
+class ProcessEvaluator(SerialEvaluator):
+    """
+    Đánh giá song song bằng process:
+    - Ma trận dist được copy một lần vào SharedMemory; worker gắn vào qua initializer.
+    - DistanceOracle (utils.distance) chỉ chứa tọa độ -> gửi thẳng cho initializer.
+    - Mỗi lần gọi chỉ pickle các khối tour (m_i, n) int32.
+    """
+    def __init__(self, dist, workers=None):
+        super().__init__(dist)
+        self.workers = workers or os.cpu_count() or 1
+        self._shm = None
+        if not isinstance(dist, (np.ndarray, list, tuple)):
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             initializer=_attach_oracle, initargs=(dist,))
+            return
+        dist = np.ascontiguousarray(dist)
+        self.dist = dist
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, dist.nbytes))
+        shared = np.ndarray(dist.shape, dtype=dist.dtype, buffer=self._shm.buf)
+        shared[...] = dist
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_attach_shared,
+            initargs=(self._shm.name, dist.shape, dist.dtype.str),
+        )
+
+    def tour_lengths(self, pop):
+        chunks = _split(pop, self.workers)
+        return np.concatenate(list(self._pool.map(_chunk_lengths, chunks)))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+
+
+_BACKENDS = {"serial": SerialEvaluator, "thread": ThreadEvaluator, "process": ProcessEvaluator}
+
+def make_evaluator(dist, backend="serial", workers=None):
+    """
+    Tạo backend đánh giá từ tên ("serial" / "thread" / "process").
+    Nếu `backend` đã là một evaluator (có tour_lengths) thì trả lại nguyên vẹn.
+    Trả về: (evaluator, owned) — owned=True nghĩa là người gọi phải close().
+    """
+    if hasattr(backend, "tour_lengths"):
+        return backend, False
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown evaluator backend: {backend!r}")
+    if backend == "serial":
+        return SerialEvaluator(dist), True
+    return _BACKENDS[backend](dist, workers=workers), True
+
+@contextmanager
+def open_evaluator(dist, backend="serial", workers=None):
+    """`with open_evaluator(dist, "process") as ev:` — tự close() backend do chính nó tạo."""
+    ev, owned = make_evaluator(dist, backend, workers)
+    try:
+        yield ev
+    finally:
+        if owned:
+            ev.close()
@@ -0,0 +1,253 @@
+import weakref
+import numpy as np
+from collections import deque
+
+# ---------- Danh sách láng giềng (candidate lists) ----------
+def neighbor_lists(dist, k=10, chunk=1024):
+    """
+    k láng giềng gần nhất của mỗi đỉnh:
+    - Tính theo từng khối `chunk` hàng để bộ nhớ tạm chỉ là O(chunk * n).
+    - Trả về mảng (n, k) int32, mỗi hàng sắp tăng dần theo khoảng cách.
+    """
+    n = dist.shape[0]
+    k = max(1, min(k, n - 1))
+    out = np.empty((n, k), dtype=np.int32)
+    for lo in range(0, n, chunk):
+        hi = min(n, lo + chunk)
+        rows = np.array(dist[lo:hi], dtype=float)
+        rows[np.arange(hi - lo), np.arange(lo, hi)] = np.inf   # bỏ chính nó
+        idx = np.argpartition(rows, k - 1, axis=1)[:, :k]
+        d = np.take_along_axis(rows, idx, axis=1)
+        out[lo:hi] = np.take_along_axis(idx, np.argsort(d, axis=1, kind="stable"), axis=1)
+    return out
+
+# Cache cho ma trận dist gần nhất: giữ weakref (không giữ ma trận sống) + khóa (k, shape, dtype)
+_CACHE = {"ref": None, "key": None, "nbr": None, "nd": None}
+
+def _forget(ref):
+    """Callback của weakref: ma trận đã bị thu hồi -> bỏ luôn neighbor list của nó."""
+    if _CACHE["ref"] is ref:
+        _CACHE.update(ref=None, key=None, nbr=None, nd=None)
+
+def _candidates(dist, neighbors, k):
+    """
+    Trả về (nbr, nd) dạng list Python cho vòng lặp local search:
+    nbr[a] = láng giềng của a, nd[a] = khoảng cách tương ứng.
+    neighbors=None: dựng từ dist và nhớ cho ma trận gần nhất — chỉ dùng lại khi đúng đối tượng đó
+    còn sống và cùng (k, shape, dtype). Ma trận bị sửa tại chỗ thì không phát hiện được
+    -> truyền neighbors tường minh (neighbor_lists) trong trường hợp đó.
+    """
+    if neighbors is None:
+        key = (k, tuple(dist.shape), getattr(dist, "dtype", None))
+        ref = _CACHE["ref"]
+        if ref is not None and ref() is dist and _CACHE["key"] == key:
+            return _CACHE["nbr"], _CACHE["nd"]
+        neighbors = neighbor_lists(dist, k)
+        nbr, nd = _candidates(dist, neighbors, k)
+        try:
+            ref = weakref.ref(dist, _forget)
+        except TypeError:   # đối tượng không hỗ trợ weakref -> không cache
+            return nbr, nd
+        _CACHE.update(ref=ref, key=key, nbr=nbr, nd=nd)
+        return nbr, nd
+    neighbors = np.asarray(neighbors)
+    rows = np.arange(neighbors.shape[0])[:, None]
+    nd = np.asarray(dist[rows, neighbors], dtype=float)
+    return neighbors.tolist(), nd.tolist()
+
+def _positions(tour):
+    pos = [0] * len(tour)
+    for i, c in enumerate(tour):
+        pos[c] = i
+    return pos
+
+def _reverse(tour, pos, i, j):
+    """
+    Đảo đoạn vòng tour[i..j] (theo chiều tiến, có thể quấn qua cuối mảng).
+    Đảo phần ngắn hơn (đoạn hoặc phần bù của nó) -> cùng một chu trình,
+    chi phí O(min(len, n - len)); mảng vị trí pos được cập nhật theo.
+    """
+    n = len(tour)
+    inner = (j - i) % n + 1
+    if 2 * inner > n:
+        i, j = (j + 1) % n, (i - 1) % n
+        inner = n - inner
+    for _ in range(inner // 2):
+        ci, cj = tour[i], tour[j]
+        tour[i] = cj
+        pos[cj] = i
+        tour[j] = ci
+        pos[ci] = j
+        i += 1
+        if i == n:
+            i = 0
+        j -= 1
+        if j < 0:
+            j = n - 1
+
+# ---------- 2-opt: neighbor list + don't-look bits + first-improvement ----------
+def two_opt(tour, dist, neighbors=None, k=10, max_moves=None, eps=1e-9):
+    """
+    2-opt nhanh:
+    - Chỉ thử cạnh mới (a, c) với c thuộc k láng giềng gần nhất của a,
+      dừng sớm khi d(a,c) >= d(a, succ/pred a) (không thể có lợi).
+    - Don't-look bits: chỉ xét lại các đỉnh nằm trong hàng đợi (đầu mút của cạnh vừa đổi).
+    - First-improvement: áp dụng ngay nước đi cải thiện đầu tiên.
+    - Mảng vị trí pos -> tìm succ/pred O(1), đảo đoạn chỉ tốn phần ngắn hơn.
+    - max_moves: giới hạn số nước đi (None = tới cực tiểu địa phương).
+    Nếu tour là list thì được sửa tại chỗ; luôn trả về list.
+    """
+    n = len(tour)
+    t = tour if isinstance(tour, list) else [int(c) for c in tour]
+    if isinstance(dist, (list, tuple)):
+        dist = np.asarray(dist)
+    if n < 5:
+        return t
+    nbr, nd = _candidates(dist, neighbors, k)
+    pos = _positions(t)
+    queue = deque(t)
+    queued = [True] * n
+    moves = 0
+
+    while queue and (max_moves is None or moves < max_moves):
+        a = queue.popleft()
+        queued[a] = False
+        improved = False
+        for step in (1, -1):
+            pa = pos[a]
+            b = t[(pa + step) % n]
+            d_ab = dist[a, b]
+            for c, d_ac in zip(nbr[a], nd[a]):
+                if d_ac >= d_ab - eps:
+                    break
+                pc = pos[c]
+                d = t[(pc + step) % n]
+                if c == b or d == a:
+                    continue
+                delta = d_ac + dist[b, d] - d_ab - dist[c, d]
+                if delta < -eps:
+                    # cạnh mới (a,c), (b,d)
+                    if step == 1:
+                        _reverse(t, pos, pos[b], pc)
+                    else:
+                        _reverse(t, pos, pa, pos[d])
+                    for x in (a, b, c, d):
+                        if not queued[x]:
+                            queued[x] = True
+                            queue.append(x)
+                    moves += 1
+                    improved = True
+                    break
+            if improved:
+                break
+    return t
+
+def _two_opt_move(tour, pos, a, b, c, d):
+    """
+    Nước đi 2-opt theo tên đỉnh: bỏ (a,b), (c,d), thêm (a,c), (b,d),
+    với thứ tự vòng a -> b ... c -> d (theo một trong hai chiều của mảng).
+    """
+    n = len(tour)
+    if tour[(pos[a] + 1) % n] == b:
+        _reverse(tour, pos, pos[b], pos[c])
+    else:
+        _reverse(tour, pos, pos[c], pos[b])
+
+# ---------- Or-opt: di chuyển đoạn 1..3 đỉnh (có thể đảo chiều) ----------
+def or_opt(tour, dist, neighbors=None, k=10, max_seg=3, max_moves=None, eps=1e-9):
+    """
+    Or-opt / 3-opt hạn chế (segment insertion + reversal):
+    - Lấy đoạn S = s1..s2 (1..max_seg đỉnh) nằm giữa p và nx, chèn vào cạnh (x, y)
+      với x hoặc y thuộc danh sách láng giềng của s1/s2; thử cả chiều thuận và đảo.
+    - Delta O(1): d(x,s1)+d(s2,y)-d(x,y) (hoặc d(x,s2)+d(s1,y)-d(x,y)) trừ lợi ích bỏ đoạn
+      d(p,s1)+d(s2,nx)-d(p,nx).
+    - Áp dụng bằng 2-3 nước 2-opt liên tiếp trên mảng tour + pos (không dựng lại tour).
+    - Don't-look bits + first-improvement như two_opt.
+    """
+    n = len(tour)
+    t = tour if isinstance(tour, list) else [int(c) for c in tour]
+    if isinstance(dist, (list, tuple)):
+        dist = np.asarray(dist)
+    if n < 8:
+        return t
+    nbr, nd = _candidates(dist, neighbors, k)
+    pos = _positions(t)
+    queue = deque(t)
+    queued = [True] * n
+    moves = 0
+
+    while queue and (max_moves is None or moves < max_moves):
+        s1 = queue.popleft()
+        queued[s1] = False
+        move = None
+        for L in range(1, max_seg + 1):
+            i = pos[s1]
+            p = t[(i - 1) % n]
+            s2 = t[(i + L - 1) % n]
+            nx = t[(i + L) % n]
+            seg = set(t[(i + j) % n] for j in range(L))
+            gain = dist[p, s1] + dist[s2, nx] - dist[p, nx]
+            if gain <= eps:
+                continue
+            for end in ((s1, s2) if L > 1 else (s1,)):
+                for c, d_c in zip(nbr[end], nd[end]):
+                    if d_c >= gain - eps:
+                        break
+                    if c in seg:
+                        continue
+                    pc = pos[c]
+                    for x, y in ((c, t[(pc + 1) % n]), (t[(pc - 1) % n], c)):
+                        if x in seg or y in seg or y == p:
+                            continue
+                        d_xy = dist[x, y]
+                        delta = dist[x, s1] + dist[s2, y] - d_xy - gain
+                        if delta < -eps:
+                            move = (p, s1, s2, nx, x, y, False)
+                            break
+                        if L > 1:
+                            delta = dist[x, s2] + dist[s1, y] - d_xy - gain
+                            if delta < -eps:
+                                move = (p, s1, s2, nx, x, y, True)
+                                break
+                    if move:
+                        break
+                if move:
+                    break
+            if move:
+                break
+        if move is None:
+            continue
+
+        p, s1, s2, nx, x, y, reverse = move
+        # p S1..S2 nx ... x y  ->  p nx ... x [S1..S2 | S2..S1] y
+        if x == nx:
+            _two_opt_move(t, pos, p, s1, nx, y)
+        else:
+            _two_opt_move(t, pos, p, s1, x, y)
+            _two_opt_move(t, pos, p, x, nx, s2)
+        if not reverse:
+            _two_opt_move(t, pos, x, s2, s1, y)
+        for v in (p, s1, s2, nx, x, y):
+            if not queued[v]:
+                queued[v] = True
+                queue.append(v)
+        moves += 1
+    return t
+
+def or_3opt(tour, dist, neighbors=None, k=10, max_seg=3, max_rounds=20):
+    """
+    Local search Or-3opt: xen kẽ two_opt và or_opt tới khi cả hai không còn cải thiện
+    (hoặc hết max_rounds vòng). Dùng làm bước memetic cho GA.
+    """
+    t = tour if isinstance(tour, list) else [int(c) for c in tour]
+    if isinstance(dist, (list, tuple)):
+        dist = np.asarray(dist)
+    if neighbors is None:
+        neighbors = neighbor_lists(dist, k)
+    for _ in range(max_rounds):
+        two_opt(t, dist, neighbors=neighbors)
+        before = list(t)
+        or_opt(t, dist, neighbors=neighbors, max_seg=max_seg)
+        if t == before:
+            break
+    return t
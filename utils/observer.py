@@ -0,0 +1,249 @@
+import csv
+import json
+import numpy as np
+from time import perf_counter
+
+"""
+Quan sát từng thế hệ của các engine (GA, GA_array, TSP_GA_2.GA, GA_tsp, mfea):
+- Engine nhận `observer=None`; None -> không đo gì (chỉ vài lời gọi no-op mỗi thế hệ).
+- Mỗi thế hệ observer nhận một event (dict):
+      engine, gen, elapsed (giây từ lúc engine bắt đầu), phases {pha: giây},
+      evals (tích lũy), evals_gen, best, mean, diversity (+ trường riêng của engine)
+  gen = 0 là quần thể khởi tạo (phases rỗng, elapsed = thời gian khởi tạo).
+- Pha: selection, crossover, mutation, evaluation, local_search, elitism — đo bằng PhaseClock.lap():
+  thời gian kể từ lần lap trước được cộng vào pha được gọi tên.
+- Sink có sẵn: Observer (null), CSVObserver, JSONLObserver, SummaryObserver (trong bộ nhớ), Tee (nhiều sink).
+"""
+
+PHASES = ("selection", "crossover", "mutation", "evaluation", "local_search", "elitism")
+
+
+# ---------- Đồng hồ theo pha ----------
+class PhaseClock:
+    """Cộng dồn thời gian theo pha trong một thế hệ."""
+    __slots__ = ("times", "_t")
+
+    def __init__(self):
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self._t = perf_counter()
+
+    def lap(self, phase):
+        now = perf_counter()
+        self.times[phase] += now - self._t
+        self._t = now
+
+    def reset(self):
+        """Trả về thời gian các pha của thế hệ vừa xong và bắt đầu thế hệ mới."""
+        times, self.times = self.times, dict.fromkeys(PHASES, 0.0)
+        self._t = perf_counter()
+        return times
+
+
+class _NullClock:
+    __slots__ = ()
+
+    def lap(self, phase):
+        pass
+
+    def reset(self):
+        return {}
+
+NULL_CLOCK = _NullClock()
+
+
+# ---------- Độ đa dạng ----------
+def edge_diversity(pop, best):
+    """Tỉ lệ cạnh (vô hướng) trung bình của các tour không nằm trong tour best — 0 = hội tụ hết."""
+    pop = np.asarray(pop)
+    if pop.ndim == 1:
+        pop = pop[None, :]
+    best = np.asarray(best)
+    n = len(best)
+    succ = np.empty(n, dtype=np.int64)
+    pred = np.empty(n, dtype=np.int64)
+    succ[best] = np.roll(best, -1)
+    pred[best] = np.roll(best, 1)
+    nxt = np.roll(pop, -1, axis=1)
+    shared = (succ[pop] == nxt) | (pred[pop] == nxt)
+    return float(1.0 - shared.mean())
+
+def gene_diversity(X):
+    """Độ lệch chuẩn trung bình theo gene của quần thể số thực (m, D)."""
+    return float(np.asarray(X).std(axis=0).mean())
+
+
+# ---------- Sink ----------
+class Observer:
+    """Observer gốc = null sink: mọi callback không làm gì. Kế thừa và ghi đè những gì cần."""
+    def on_start(self, engine, **info):
+        pass
+
+    def on_generation(self, event):
+        pass
+
+    def on_end(self, **info):
+        pass
+
+
+class Tee(Observer):
+    """Chuyển mọi event tới nhiều observer."""
+    def __init__(self, *observers):
+        self.observers = observers
+
+    def on_start(self, engine, **info):
+        for o in self.observers:
+            o.on_start(engine, **info)
+
+    def on_generation(self, event):
+        for o in self.observers:
+            o.on_generation(event)
+
+    def on_end(self, **info):
+        for o in self.observers:
+            o.on_end(**info)
+
+
+def _flat(event):
+    """Event -> dict phẳng: phases -> cột phase_<tên>, list (vd. best của MFEA) -> JSON."""
+    row = {k: v for k, v in event.items() if k != "phases"}
+    for name in PHASES:
+        row[f"phase_{name}"] = event.get("phases", {}).get(name)
+    return {k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in row.items()}
+
+
+class JSONLObserver(Observer):
+    """Mỗi thế hệ một dòng JSON (append) vào `path`."""
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+
+    def on_start(self, engine, **info):
+        self._f = open(self.path, "a")
+
+    def on_generation(self, event):
+        self._f.write(json.dumps(event) + "\n")
+
+    def on_end(self, **info):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class CSVObserver(Observer):
+    """Mỗi thế hệ một hàng CSV (cột phase_<tên> cho từng pha); header ghi khi file còn rỗng."""
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+        self._writer = None
+
+    def on_start(self, engine, **info):
+        self._f = open(self.path, "a", newline="")
+        self._writer = None
+
+    def on_generation(self, event):
+        row = _flat(event)
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._f, fieldnames=list(row), extrasaction="ignore")
+            if self._f.tell() == 0:
+                self._writer.writeheader()
+        self._writer.writerow(row)
+
+    def on_end(self, **info):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class SummaryObserver(Observer):
+    """
+    Tổng hợp trong bộ nhớ: tổng thời gian mỗi pha, số thế hệ, số đánh giá, best cuối.
+    keep_events=True giữ lại mọi event (vd. để tính thời gian đạt một mức chi phí).
+    """
+    def __init__(self, keep_events=True):
+        self.keep_events = keep_events
+        self.events = []
+        self.engine = None
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.generations = 0
+        self.evals = 0
+        self.elapsed = 0.0
+        self.best = None
+        self.info = {}
+
+    def on_start(self, engine, **info):
+        self.engine = engine
+        self.info = dict(info)
+
+    def on_generation(self, event):
+        if self.keep_events:
+            self.events.append(event)
+        for name, t in event["phases"].items():
+            self.phases[name] = self.phases.get(name, 0.0) + t
+        self.generations = event["gen"]
+        self.evals = event["evals"]
+        self.elapsed = event["elapsed"]
+        self.best = event["best"]
+
+    def on_end(self, **info):
+        self.info.update(info)
+
+    def summary(self):
+        total = sum(self.phases.values())
+        return dict(
+            engine=self.engine, generations=self.generations, evals=self.evals, elapsed=self.elapsed,
+            evals_per_s=self.evals / self.elapsed if self.elapsed > 0 else None, best=self.best,
+            phases=dict(self.phases),
+            phase_share={k: (v / total if total > 0 else 0.0) for k, v in self.phases.items()},
+        )
+
+    def report(self):
+        """Bảng chữ: thời gian và tỉ lệ từng pha."""
+        s = self.summary()
+        lines = [f"{s['engine']}: {s['generations']} gens, {s['evals']} evals, {s['elapsed']:.3f}s, best={s['best']}"]
+        for name, t in s["phases"].items():
+            lines.append(f"  {name:<13} {t:9.4f}s  {100 * s['phase_share'][name]:5.1f}%")
+        return "\n".join(lines)
+
+
+# ---------- Phía engine ----------
+class Tracker:
+    """
+    Trạng thái quan sát của một lần chạy engine. observer=None -> clock là NULL_CLOCK và
+    generation() trả về ngay (không đo thời gian, không tính best/mean/diversity).
+    """
+    def __init__(self, observer, engine, **info):
+        self.observer = observer
+        self.active = observer is not None
+        self.engine = engine
+        self.evals = 0
+        self.t0 = perf_counter()
+        self.clock = PhaseClock() if self.active else NULL_CLOCK
+        if self.active:
+            observer.on_start(engine, **info)
+
+    def generation(self, gen, costs=None, evals=0, diversity=None, **extra):
+        """
+        Gửi event của thế hệ `gen`:
+        - costs: chi phí quần thể (best = min, mean) hoặc hàm không đối số trả về chúng (chỉ gọi
+          khi active) — hoặc truyền best=/mean= trong extra
+        - evals: số lần đánh giá trong thế hệ; diversity: hàm không đối số (chỉ gọi khi active)
+        """
+        if not self.active:
+            return
+        self.evals += evals
+        event = dict(engine=self.engine, gen=gen, elapsed=perf_counter() - self.t0,
+                     phases=self.clock.reset() if gen else {}, evals=self.evals, evals_gen=evals)
+        if callable(costs):
+            costs = costs()
+        if costs is not None:
+            costs = np.asarray(costs, dtype=float)
+            event["best"] = float(costs.min())
+            event["mean"] = float(costs.mean())
+        event["diversity"] = diversity() if diversity is not None else None
+        event.update(extra)
+        self.observer.on_generation(event)
+        self.clock.reset()   # thời gian của observer không tính vào pha nào
+
+    def end(self, **info):
+        if self.active:
+            self.observer.on_end(**info)
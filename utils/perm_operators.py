@@ -0,0 +1,58 @@
+import random
+
+"""
+Toán tử hoán vị (TSP) dạng list dùng chung cho các engine GA (TSP_GA_1.GA, RLGA GA_tsp):
+- Cá thể là list các thành phố (hoán vị 0..n-1).
+- Nguồn ngẫu nhiên có API của module random (rng=random mặc định, hoặc random.Random từ utils.rng.py_random).
+Module chỉ phụ thuộc thư viện chuẩn -> import được mà không kéo theo plot / loader.
+"""
+
+def crossover_ERX(parent1, parent2, rng=random):
+    """
+    Edge Recombination Crossover (ERX) — trả về 1 con, giữ tối đa cạnh của cha mẹ:
+    B1: Bảng kề adj (n, 4): 2 láng giềng của mỗi đỉnh trong parent1 + 2 trong parent2
+        (láng giềng xuất hiện 2 lần = cạnh chung của cả hai cha mẹ)
+    B2: Bắt đầu từ parent1[0]; mỗi bước đi sang láng giềng chưa thăm, ưu tiên cạnh chung,
+        sau đó đỉnh còn ít láng giềng chưa thăm nhất (hòa thì chọn ngẫu nhiên)
+    B3: Không còn láng giềng chưa thăm -> chọn ngẫu nhiên một đỉnh chưa thăm
+    Mỗi bước chỉ chạm tới <= 4 láng giềng -> O(n) cho cả tour.
+    """
+    size = len(parent1)
+    adj = [[] for _ in range(size)]
+    for parent in (parent1, parent2):
+        prev = parent[-1]
+        for x in parent:
+            adj[prev].append(x)
+            adj[x].append(prev)
+            prev = x
+    degree = [len(set(a)) for a in adj]   # số láng giềng (khác nhau) chưa thăm
+
+    # danh sách đỉnh chưa thăm + vị trí -> xóa / chọn ngẫu nhiên O(1)
+    unvisited = list(range(size))
+    where = list(range(size))
+
+    def visit(x):
+        i, last = where[x], unvisited[-1]
+        unvisited[i], where[last] = last, i
+        unvisited.pop()
+        where[x] = -1
+        for y in set(adj[x]):
+            degree[y] -= 1
+
+    cur = parent1[0]
+    child = [cur]
+    visit(cur)
+    while unvisited:
+        cand = [y for y in adj[cur] if where[y] >= 0]
+        if not cand:
+            cur = unvisited[rng.randrange(len(unvisited))]
+        else:
+            shared = [y for y in set(cand) if cand.count(y) > 1]
+            if shared:
+                cur = shared[0] if len(shared) == 1 else rng.choice(shared)
+            else:
+                low = min(degree[y] for y in cand)
+                cur = rng.choice([y for y in cand if degree[y] == low])
+        child.append(cur)
+        visit(cur)
+    return child
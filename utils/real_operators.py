@@ -0,0 +1,76 @@
+import numpy as np
+
+"""
+Toán tử mã hóa số thực [0,1]^D dạng lô (batch):
+- Input là mảng (số cặp / số cá thể, D), mọi phép chọn gene dùng mask NumPy.
+- Nguồn ngẫu nhiên là numpy.random.Generator (rng=None -> default_rng()).
+Cùng công thức với sbx_crossover / polynomial_mutation / gaussian_mutation từng cá thể
+trong src/GA/TSP_GA_2.py và src/MFEA/mfea/operators.py.
+"""
+
+def _rng(rng):
+    return rng if rng is not None else np.random.default_rng()
+
+def _betaq(beta, rand, eta_c):
+    alpha = 2.0 - beta ** (-(eta_c + 1))
+    return np.where(rand <= 1.0 / alpha,
+                    (rand * alpha) ** (1.0 / (eta_c + 1)),
+                    (1.0 / (2.0 - rand * alpha)) ** (1.0 / (eta_c + 1)))
+
+# -------- Crossover ----------
+def sbx_crossover_batch(P1, P2, eta_c=2, rng=None):
+    """
+    SBX cho cả lô cặp cha mẹ (pairs, D):
+    1. Mask gene lai (xác suất 0.5, bỏ gene có p1 == p2)
+    2. x1 = min, x2 = max; beta/betaq theo biên trái [0] và biên phải [1]
+    3. c1 = 0.5*((x1+x2) - betaq1*(x2-x1)), c2 = 0.5*((x1+x2) + betaq2*(x2-x1)), kẹp trong [0,1]
+    Trả về: (C1, C2) cùng kích thước với P1.
+    """
+    rng = _rng(rng)
+    P1 = np.asarray(P1, dtype=float)
+    P2 = np.asarray(P2, dtype=float)
+    x1 = np.minimum(P1, P2)
+    x2 = np.maximum(P1, P2)
+    diff = x2 - x1
+    mask = (rng.random(P1.shape) <= 0.5) & (diff > 1e-14)
+    rand = rng.random(P1.shape)
+    span = np.where(mask, diff, 1.0)
+
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        bq1 = _betaq(1.0 + 2.0 * x1 / span, rand, eta_c)
+        bq2 = _betaq(1.0 + 2.0 * (1.0 - x2) / span, rand, eta_c)
+    c1 = np.clip(0.5 * ((x1 + x2) - bq1 * diff), 0.0, 1.0)
+    c2 = np.clip(0.5 * ((x1 + x2) + bq2 * diff), 0.0, 1.0)
+    return np.where(mask, c1, P1), np.where(mask, c2, P2)
+
+# --------- Mutation -----------
+def polynomial_mutation_batch(X, eta_m=20, pm=None, rng=None):
+    """
+    Polynomial Mutation cho cả lô (m, D):
+    - Mỗi gene đột biến với xác suất pm (mặc định 1/D)
+    - rand < 0.5 dịch sang trái, ngược lại dịch sang phải, kẹp trong [0,1]
+    Trả về mảng mới.
+    """
+    rng = _rng(rng)
+    X = np.asarray(X, dtype=float)
+    if pm is None:
+        pm = 1.0 / X.shape[-1]
+    mask = rng.random(X.shape) < pm
+    rand = rng.random(X.shape)
+    mut_pow = 1.0 / (eta_m + 1.0)
+
+    left = 2.0 * rand + (1.0 - 2.0 * rand) * (1.0 - X) ** (eta_m + 1)
+    right = 2.0 * (1.0 - rand) + 2.0 * (rand - 0.5) * X ** (eta_m + 1)
+    with np.errstate(invalid="ignore"):
+        deltaq = np.where(rand < 0.5, left ** mut_pow - 1.0, 1.0 - right ** mut_pow)
+    return np.where(mask, np.clip(X + deltaq, 0.0, 1.0), X)
+
+def gaussian_mutation_batch(X, sigma=0.1, pm=None, rng=None):
+    """Gaussian Mutation cho cả lô (m, D): gene được chọn (xác suất pm) cộng N(0, sigma), kẹp [0,1]."""
+    rng = _rng(rng)
+    X = np.asarray(X, dtype=float)
+    if pm is None:
+        pm = 1.0 / X.shape[-1]
+    mask = rng.random(X.shape) < pm
+    noise = rng.normal(0.0, sigma, X.shape)
+    return np.where(mask, np.clip(X + noise, 0.0, 1.0), X)
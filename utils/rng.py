@@ -0,0 +1,30 @@
+import random
+import numpy as np
+
+"""
+Nguồn ngẫu nhiên dùng chung cho mọi engine (GA, GA_array, TSP_GA_2, GA_tsp, MFEA, EdgeDoubleQL):
+- Mỗi engine nhận `seed` = None / int / SeedSequence / numpy.random.Generator và chỉ rút số
+  từ Generator đó (không đụng tới random / np.random toàn cục) -> chạy lại cho cùng kết quả.
+- Toán tử dạng list (random.sample, random.choice, ...) dùng một random.Random sinh từ
+  Generator (py_random): cùng API với module random, nhanh hơn khi gọi lẻ từng số.
+- Worker (đảo, process pool) nhận luồng con độc lập từ spawn(), không dùng chung trạng thái.
+"""
+
+def as_generator(seed=None):
+    """seed (None / int / SeedSequence / Generator) -> numpy.random.Generator (Generator giữ nguyên)."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+def spawn(seed, k):
+    """
+    k Generator con độc lập (SeedSequence.spawn) từ seed hoặc Generator cha.
+    Rút entropy từ cha -> kết quả phụ thuộc (và làm tiến) trạng thái của cha.
+    """
+    rng = as_generator(seed)
+    entropy = rng.integers(0, 2 ** 32, size=4, dtype=np.uint64).tolist()
+    return [np.random.default_rng(s) for s in np.random.SeedSequence(entropy).spawn(k)]
+
+def py_random(seed=None):
+    """random.Random gieo từ Generator / seed — cho các toán tử dạng list."""
+    return random.Random(int(as_generator(seed).integers(0, 2 ** 63)))
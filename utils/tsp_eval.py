@@ -0,0 +1,50 @@
+import numpy as np
+
+# ---------- Đánh giá độ dài tour theo lô (batch) ----------
+def tour_lengths(pop, dist):
+    """
+    Tính độ dài của cả quần thể tour trong một lần gọi NumPy:
+    - pop: mảng số nguyên (m, n), mỗi hàng là một hoán vị (hoặc (n,) cho 1 tour)
+    - dist: ma trận khoảng cách (n, n)
+    Cạnh i -> i+1 (kể cả cạnh quay về) lấy bằng fancy indexing:
+        dist[pop, np.roll(pop, -1, axis=1)]
+    Trả về: mảng (m,) độ dài tour.
+    """
+    pop = np.asarray(pop, dtype=np.intp)
+    if pop.ndim == 1:
+        pop = pop[None, :]
+    if isinstance(dist, (list, tuple)):
+        dist = np.asarray(dist)
+    return dist[pop, np.roll(pop, -1, axis=1)].sum(axis=1)
+
+def tour_length(tour, dist):
+    """Độ dài của 1 tour (dùng chung bộ đánh giá batch)."""
+    return float(tour_lengths(tour, dist)[0])
+
+
+# ---------- Độ lệch chi phí (delta) cho đột biến ----------
+def swap_delta(tour, dist, i, j):
+    """
+    Thay đổi độ dài khi hoán đổi tour[i] và tour[j] (tính TRƯỚC khi đổi):
+    chỉ các cạnh bắt đầu tại i-1, i, j-1, j thay đổi (xử lý cả i, j kề nhau / vòng quanh).
+    """
+    n = len(tour)
+    if i == j:
+        return 0.0
+    after = lambda p: tour[j] if p == i else tour[i] if p == j else tour[p]
+    delta = 0.0
+    for p in {(i - 1) % n, i, (j - 1) % n, j}:
+        q = (p + 1) % n
+        delta += dist[after(p), after(q)] - dist[tour[p], tour[q]]
+    return float(delta)
+
+def reversal_delta(tour, dist, a, b):
+    """
+    Thay đổi độ dài khi đảo đoạn tour[a:b] (tính TRƯỚC khi đảo, ma trận đối xứng):
+    cạnh (a-1, a) và (b-1, b) được thay bằng (a-1, b-1) và (a, b).
+    """
+    n = len(tour)
+    if b - a < 2 or b - a >= n - 1:
+        return 0.0
+    p, q = tour[a - 1], tour[b % n]
+    return float(dist[p, tour[b - 1]] + dist[tour[a], q] - dist[p, tour[a]] - dist[tour[b - 1], q])
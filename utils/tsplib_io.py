@@ -0,0 +1,178 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+
+from utils.distance import DistanceOracle, WEIGHT_TYPES
+
+"""
+Đọc file TSPLIB (.tsp) trực tiếp vào NumPy, không qua tsplib95:
+- Header "KEY : VALUE" đọc từng dòng; NODE_COORD_SECTION / EDGE_WEIGHT_SECTION
+  được cắt thành một khối văn bản và chuyển một lần bằng np.fromstring.
+- Khoảng cách tính vector hoá bằng DistanceOracle (cùng quy tắc làm tròn TSPLIB).
+- Kết quả được cache ra .npy theo hash nội dung file; các lần sau np.load(mmap_mode="r").
+Kiểu không hỗ trợ (EUC_3D, XRAY, SPECIAL, ...) quay về tsplib95 + distance_from_problem.
+"""
+
+CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "tsplib"
+
+_DATA_LINE_END = re.compile(r"^[ \t]*[A-Za-z]", re.M)   # dòng bắt đầu bằng chữ = hết khối số
+
+# thứ tự đọc của EDGE_WEIGHT_FORMAT (dạng cột = dạng hàng của tam giác đối diện)
+_TRI_FORMATS = {
+    "UPPER_ROW": (True, 1), "LOWER_COL": (True, 1),
+    "UPPER_DIAG_ROW": (True, 0), "LOWER_DIAG_COL": (True, 0),
+    "LOWER_ROW": (False, -1), "UPPER_COL": (False, -1),
+    "LOWER_DIAG_ROW": (False, 0), "UPPER_DIAG_COL": (False, 0),
+}
+
+def _section_numbers(text, start):
+    """Các số từ vị trí `start` tới dòng chữ kế tiếp (hoặc hết file)."""
+    m = _DATA_LINE_END.search(text, start)
+    block = text[start:m.start() if m else len(text)]
+    return np.fromstring(block, dtype=float, sep=" ")
+
+def _explicit_matrix(values, n, fmt):
+    """EDGE_WEIGHT_SECTION -> ma trận (n, n) theo EDGE_WEIGHT_FORMAT."""
+    if fmt == "FULL_MATRIX":
+        return values[:n * n].reshape(n, n).copy()
+    if fmt not in _TRI_FORMATS:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_FORMAT: {fmt!r}")
+    upper, k = _TRI_FORMATS[fmt]
+    i, j = np.triu_indices(n, k) if upper else np.tril_indices(n, k)
+    out = np.zeros((n, n), dtype=float)
+    out[i, j] = values[:len(i)]
+    out[j, i] = values[:len(i)]
+    return out
+
+def read_tsplib(path):
+    """
+    Phân tích một file .tsp:
+    Trả về dict với "header" (KEY -> VALUE), "coords" (n, 2) hoặc None,
+    "weights" (n, n) cho EDGE_WEIGHT_TYPE EXPLICIT hoặc None.
+    """
+    text = Path(path).read_text()
+    header, coords, weights = {}, None, None
+    pos = 0
+    while pos < len(text):
+        end = text.find("\n", pos)
+        end = len(text) if end < 0 else end + 1
+        line = text[pos:end].strip()
+        pos = end
+        if not line:
+            continue
+        key = line.split(":", 1)[0].strip().upper()
+        if key == "EOF":
+            break
+        if key.endswith("_SECTION"):
+            nums = _section_numbers(text, pos)
+            n = int(header.get("DIMENSION", 0))
+            if key == "NODE_COORD_SECTION":
+                width = 4 if header.get("NODE_COORD_TYPE") == "THREED_COORDS" else 3   # id x y [z]
+                n = n or len(nums) // width
+                coords = nums[:n * width].reshape(n, width)[:, 1:3].copy()
+            elif key == "EDGE_WEIGHT_SECTION":
+                weights = _explicit_matrix(nums, n, header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX"))
+            m = _DATA_LINE_END.search(text, pos)
+            pos = m.start() if m else len(text)
+            continue
+        if ":" in line:
+            header[key] = line.split(":", 1)[1].strip()
+    return {"header": header, "coords": coords, "weights": weights}
+
+
+# ---------- Cache .npy ----------
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+def _save_npy(path, arr):
+    # ghi ra file tạm rồi đổi tên -> không bao giờ để lại cache dở dang
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+def _build(path, meta):
+    """Đọc file và dựng (dist dày hoặc None, coords hoặc None), cập nhật meta["weight_type"]."""
+    data = read_tsplib(path)
+    weight_type = data["header"].get("EDGE_WEIGHT_TYPE", "EXPLICIT")
+    meta["weight_type"] = weight_type
+    if data["weights"] is not None:
+        return data["weights"], data["coords"]
+    if data["coords"] is not None and weight_type in WEIGHT_TYPES:
+        return None, data["coords"]
+    # kiểu khoảng cách chưa hỗ trợ trực tiếp -> tsplib95
+    import tsplib95
+    from utils.distance import distance_from_problem
+    return distance_from_problem(tsplib95.load(str(path)))
+
+def load_tsp(path, dense=True, cache_rows=0, cache_dir=None, use_cache=True):
+    """
+    Nạp instance TSPLIB:
+    - dense=True : ma trận (n, n) float (mmap chỉ đọc khi lấy từ cache)
+    - dense=False: DistanceOracle từ tọa độ (chỉ cache coords); EXPLICIT luôn trả ma trận dày
+    - cache_dir  : thư mục cache (mặc định <project>/.cache/tsplib); use_cache=False bỏ qua cache
+    Trả về: (dist, coords) — giống distance_from_problem.
+    """
+    path = Path(path)
+    if not use_cache:
+        meta = {}
+        dist, coords = _build(path, meta)
+        if dist is None:
+            oracle = DistanceOracle(coords, meta["weight_type"], cache_rows=cache_rows)
+            dist = oracle.to_dense() if dense else oracle
+        return dist, coords
+
+    root = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    stem = root / f"{path.stem}-{_file_digest(path)}"
+    meta_path = stem.with_name(stem.name + ".json")
+    coords_path = stem.with_name(stem.name + ".coords.npy")
+    dist_path = stem.with_name(stem.name + ".dist.npy")
+
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        coords = np.load(coords_path, mmap_mode="r") if meta["has_coords"] else None
+        if not dense and coords is not None and meta["weight_type"] in WEIGHT_TYPES:
+            return DistanceOracle(coords, meta["weight_type"], cache_rows=cache_rows), coords
+        if dist_path.exists():
+            return np.load(dist_path, mmap_mode="r"), coords
+        dist = DistanceOracle(coords, meta["weight_type"]).to_dense()
+        _save_npy(dist_path, dist)
+        return np.load(dist_path, mmap_mode="r"), coords
+
+    root.mkdir(parents=True, exist_ok=True)
+    meta = {"source": str(path)}
+    dist, coords = _build(path, meta)
+    meta["has_coords"] = coords is not None
+    if coords is not None:
+        _save_npy(coords_path, np.ascontiguousarray(coords, dtype=float))
+    if dist is None and dense:
+        dist = DistanceOracle(coords, meta["weight_type"]).to_dense()
+    if dist is not None:
+        meta["dimension"] = len(dist)
+        _save_npy(dist_path, np.ascontiguousarray(dist, dtype=float))
+    else:
+        meta["dimension"] = len(coords)
+    tmp = meta_path.with_name(meta_path.name + f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, meta_path)   # meta ghi sau cùng: có meta nghĩa là các .npy đã đủ
+    return load_tsp(path, dense=dense, cache_rows=cache_rows, cache_dir=root)
+
+
+# ---------- File tour (.opt.tour) ----------
+def read_tour(path):
+    """TOUR_SECTION của file .tour (id 1-based, kết thúc bằng -1) -> list chỉ số 0-based."""
+    text = Path(path).read_text()
+    m = re.search(r"^\s*TOUR_SECTION\s*$", text, re.M)
+    if m is None:
+        raise ValueError(f"No TOUR_SECTION in {path}")
+    ids = np.fromstring(_DATA_LINE_END.split(text[m.end():], 1)[0], dtype=np.int64, sep=" ")
+    end = np.flatnonzero(ids < 0)
+    ids = ids[:end[0]] if len(end) else ids
+    return (ids - 1).tolist()